@@ -0,0 +1,321 @@
+import re
+import wave
+import shutil
+import threading
+import subprocess
+
+import numpy as np
+
+try:
+    from pydub import AudioSegment
+except ImportError:
+    AudioSegment = None
+
+
+# Voxtral works on 16 kHz mono audio; anything richer is resampled server-side anyway
+NATIVE_SAMPLE_RATE = 16000
+COMPRESS_CHUNK_SIZE = 1024 * 1024
+
+
+def load_audio(audio_file):
+    """Decode a file-like object into a pydub AudioSegment and rewind it"""
+    if AudioSegment is None:
+        raise RuntimeError("pydub is required for audio preprocessing. Install it with: pip install pydub")
+    audio_file.seek(0)
+    audio = AudioSegment.from_file(audio_file)
+    audio_file.seek(0)
+    return audio
+
+def audio_samples(audio):
+    """Return an AudioSegment's samples as a float32 mono array scaled to [-1, 1]"""
+    samples = np.frombuffer(audio.raw_data, dtype={1: np.int8, 2: np.int16, 4: np.int32}[audio.sample_width])
+    scale = float(2 ** (8 * audio.sample_width - 1))
+    samples = samples.astype(np.float32) / scale
+    if audio.channels > 1:
+        samples = samples.reshape(-1, audio.channels).mean(axis=1)
+    return samples
+
+def speech_intervals(samples, sample_rate, threshold_db=-45.0, min_silence_seconds=2.0, padding_seconds=0.25, frame_seconds=0.03):
+    """Return the (start, end) seconds to keep, cutting silences longer than min_silence_seconds
+
+    Frames whose RMS level is below threshold_db (dBFS) count as silent. Every silent run
+    longer than min_silence_seconds is removed except for padding_seconds at each edge, so
+    words next to a cut are not clipped.
+    """
+    frame = max(1, int(sample_rate * frame_seconds))
+    count = len(samples) // frame
+    duration = len(samples) / float(sample_rate)
+    if count == 0:
+        return [(0.0, duration)]
+
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float64)
+    level = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-12)
+    silent = level < threshold_db
+
+    # Start and end frame of each run of silent frames
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+
+    frame_length = frame / float(sample_rate)
+    long_runs = (run_ends - run_starts) * frame_length >= min_silence_seconds
+    cut_starts = run_starts[long_runs] * frame_length + padding_seconds
+    cut_ends = run_ends[long_runs] * frame_length - padding_seconds
+    # Trailing silence is cut to the end of the file, not to the last whole frame
+    cut_ends = np.where(run_ends[long_runs] == count, duration, cut_ends)
+    cut_starts = np.where(run_starts[long_runs] == 0, 0.0, cut_starts)
+
+    intervals = []
+    position = 0.0
+    for cut_start, cut_end in zip(cut_starts.tolist(), cut_ends.tolist()):
+        if cut_end <= cut_start:
+            continue
+        if cut_start > position:
+            intervals.append((position, cut_start))
+        position = cut_end
+    if position < duration:
+        intervals.append((position, duration))
+    return intervals
+
+def trim_silence(audio, threshold_db=-45.0, min_silence_seconds=2.0, padding_seconds=0.25):
+    """Cut long silences from an AudioSegment; returns (trimmed_audio, offset_map)
+
+    offset_map is a list of (trimmed_start, original_start) seconds, one per kept interval,
+    for remap_segments to translate timestamps back to the original recording.
+    """
+    intervals = speech_intervals(audio_samples(audio), audio.frame_rate, threshold_db, min_silence_seconds, padding_seconds)
+    frame_width = audio.sample_width * audio.channels
+    raw = audio.raw_data
+
+    pieces = []
+    offset_map = []
+    trimmed_position = 0.0
+    for start, end in intervals:
+        first = int(start * audio.frame_rate)
+        last = int(end * audio.frame_rate)
+        pieces.append(raw[first * frame_width:last * frame_width])
+        offset_map.append((trimmed_position, first / float(audio.frame_rate)))
+        trimmed_position += (last - first) / float(audio.frame_rate)
+
+    trimmed = AudioSegment(data=b"".join(pieces), sample_width=audio.sample_width, frame_rate=audio.frame_rate, channels=audio.channels)
+    return trimmed, offset_map
+
+def remap_segments(segments, offset_map):
+    """Shift segment timestamps from trimmed audio back onto the original recording's timeline"""
+    if not offset_map or not segments:
+        return segments
+    trimmed_starts = np.array([trimmed for trimmed, _ in offset_map])
+    shifts = np.array([original - trimmed for trimmed, original in offset_map])
+
+    def remap(times):
+        pieces = np.maximum(np.searchsorted(trimmed_starts, times, side="right") - 1, 0)
+        return times + shifts[pieces]
+
+    starts = remap(np.array([segment.get("start", 0) for segment in segments], dtype=np.float64))
+    # An end exactly on a cut belongs to the piece before it
+    ends = np.array([segment.get("end", 0) for segment in segments], dtype=np.float64)
+    ends = np.maximum(remap(np.nextafter(ends, -np.inf)), starts)
+
+    remapped = []
+    for segment, start, end in zip(segments, starts.tolist(), ends.tolist()):
+        shifted = dict(segment)
+        shifted["start"] = round(start, 3)
+        shifted["end"] = round(end, 3)
+        remapped.append(shifted)
+    return remapped
+
+def compression_format(audio_file):
+    """Return the format compress_audio would write for audio_file ("mp3" or "wav"), or None if it can't"""
+    if shutil.which("ffmpeg"):
+        return "mp3"
+    if is_wav(audio_file):
+        return "wav"
+    return None
+
+def is_wav(audio_file):
+    audio_file.seek(0)
+    header = audio_file.read(12)
+    audio_file.seek(0)
+    return header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+
+def compress_audio(audio_file, output, sample_rate=NATIVE_SAMPLE_RATE, bitrate="32k", chunk_size=COMPRESS_CHUNK_SIZE):
+    """Downmix to mono, resample and re-encode audio_file into output, streaming in chunks
+
+    Uses ffmpeg (MP3 at bitrate) when it is installed. Without it, WAV input is converted to
+    16-bit mono PCM WAV at sample_rate with NumPy. Returns the format written, or None when
+    the input can't be handled (the caller should upload the original).
+    """
+    format = compression_format(audio_file)
+    if format == "mp3":
+        _compress_with_ffmpeg(audio_file, output, sample_rate, bitrate, chunk_size)
+    elif format == "wav":
+        _compress_wav(audio_file, output, sample_rate, chunk_size)
+    audio_file.seek(0)
+    return format
+
+def _compress_with_ffmpeg(audio_file, output, sample_rate, bitrate, chunk_size):
+    process = subprocess.Popen(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0", "-vn", "-ac", "1", "-ar", str(sample_rate),
+         "-c:a", "libmp3lame", "-b:a", bitrate, "-f", "mp3", "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+    def feed():
+        try:
+            audio_file.seek(0)
+            for chunk in iter(lambda: audio_file.read(chunk_size), b""):
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        finally:
+            process.stdin.close()
+
+    # Feed the input on another thread so neither pipe can fill up and deadlock
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    for chunk in iter(lambda: process.stdout.read(chunk_size), b""):
+        output.write(chunk)
+    feeder.join()
+    errors = process.stderr.read().decode("utf-8", "replace")
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed: {errors.strip()}")
+
+def _pcm_to_float(data, sample_width, channels):
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        samples = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int8).astype(np.int32) << 16))
+        samples = samples.astype(np.float32) / (1 << 23)
+    else:
+        samples = np.frombuffer(data, dtype={2: np.int16, 4: np.int32}[sample_width]).astype(np.float32) / float(2 ** (8 * sample_width - 1))
+    return samples.reshape(-1, channels).mean(axis=1)
+
+def _lowpass_kernel(cutoff, taps=63):
+    """Hann-windowed sinc low-pass filter; cutoff is a fraction of the input sample rate"""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = np.sinc(2 * cutoff * n) * np.hanning(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+def _compress_wav(audio_file, output, sample_rate, chunk_size):
+    audio_file.seek(0)
+    with wave.open(audio_file, "rb") as source, wave.open(output, "wb") as target:
+        channels, sample_width, source_rate = source.getnchannels(), source.getsampwidth(), source.getframerate()
+        target.setnchannels(1)
+        target.setsampwidth(2)
+        target.setframerate(min(sample_rate, source_rate))
+        step = source_rate / float(min(sample_rate, source_rate))
+        frames_per_chunk = max(1, chunk_size // (channels * sample_width))
+
+        kernel = _lowpass_kernel(0.5 / step) if step > 1 else None
+        history = np.zeros(len(kernel) - 1 if kernel is not None else 0, dtype=np.float32)
+        # Filtered samples not yet consumed, and the position of the next output sample within them
+        pending = np.zeros(0, dtype=np.float32)
+        position = 0.0
+        while True:
+            data = source.readframes(frames_per_chunk)
+            if not data:
+                break
+            samples = _pcm_to_float(data, sample_width, channels)
+            if kernel is not None:
+                # Filter with the tail of the previous chunk so there are no seams at chunk edges
+                padded = np.concatenate((history, samples))
+                history = padded[len(padded) - len(history):] if len(history) else history
+                samples = np.convolve(padded, kernel, mode="valid").astype(np.float32)
+            pending = np.concatenate((pending, samples))
+            positions = np.arange(position, len(pending) - 1, step)
+            resampled = np.interp(positions, np.arange(len(pending)), pending)
+            target.writeframes((np.clip(resampled, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+            # Keep the sample the next output position interpolates from
+            position = positions[-1] + step if len(positions) else position
+            keep = int(position)
+            pending = pending[keep:]
+            position -= keep
+
+def audio_duration(path):
+    """Return the length in seconds of the audio file at path without decoding it, or None if unknown"""
+    with open(path, "rb") as f:
+        wav = is_wav(f)
+    if wav:
+        try:
+            with wave.open(path, "rb") as source:
+                return source.getnframes() / float(source.getframerate())
+        except (wave.Error, EOFError):
+            return None
+    if not shutil.which("ffmpeg"):
+        return None
+    # ffmpeg exits non-zero without an output file but still prints the input's duration
+    probe = subprocess.run(["ffmpeg", "-hide_banner", "-i", path], capture_output=True, text=True)
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", probe.stderr)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def audio_windows(duration, chunk_seconds=600, overlap_seconds=5):
+    """Return the (start_seconds, length_seconds) of overlapping windows covering duration"""
+    step = max(0.001, chunk_seconds - overlap_seconds)
+    windows = []
+    while True:
+        start = len(windows) * step
+        windows.append((start, min(chunk_seconds, duration - start)))
+        if start + chunk_seconds >= duration:
+            return windows
+
+def export_audio_window(path, output, start, seconds, format, chunk_size=COMPRESS_CHUNK_SIZE):
+    """Write seconds of audio from start of the file at path to output as format ("mp3" or "wav")
+
+    MP3 is cut with an ffmpeg seek, WAV by copying frames, so only the window is ever read.
+    """
+    if format == "mp3":
+        process = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-ss", f"{start:.3f}", "-t", f"{seconds:.3f}", "-i", path,
+             "-vn", "-c:a", "libmp3lame", "-f", "mp3", "pipe:1"],
+            stdout=output, stderr=subprocess.PIPE
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {process.stderr.decode('utf-8', 'replace').strip()}")
+        return
+    with wave.open(path, "rb") as source, wave.open(output, "wb") as target:
+        target.setnchannels(source.getnchannels())
+        target.setsampwidth(source.getsampwidth())
+        target.setframerate(source.getframerate())
+        source.setpos(min(source.getnframes(), int(start * source.getframerate())))
+        remaining = int(seconds * source.getframerate())
+        frames_per_chunk = max(1, chunk_size // (source.getnchannels() * source.getsampwidth()))
+        while remaining > 0:
+            data = source.readframes(min(frames_per_chunk, remaining))
+            if not data:
+                break
+            target.writeframes(data)
+            remaining -= len(data) // (source.getnchannels() * source.getsampwidth())
+    output.flush()
+
+def _normalize_text(text):
+    return re.sub(r"\W+", " ", text).strip().lower()
+
+def stitch_segments(chunk_results, overlap_seconds=5):
+    """Merge (offset_seconds, segments) chunk results onto the original timeline, dropping overlap duplicates"""
+    # Each overlap is cut at its midpoint: the earlier chunk keeps segments starting before
+    # it and the later chunk keeps the rest, so every stretch of audio is represented once
+    merged = []
+    for index, (offset, segments) in enumerate(chunk_results):
+        cut_start = offset + overlap_seconds / 2.0 if index > 0 else float("-inf")
+        if index + 1 < len(chunk_results):
+            cut_end = chunk_results[index + 1][0] + overlap_seconds / 2.0
+        else:
+            cut_end = float("inf")
+
+        for segment in segments:
+            shifted = dict(segment)
+            shifted["start"] = segment.get("start", 0) + offset
+            shifted["end"] = segment.get("end", 0) + offset
+            if not cut_start <= shifted["start"] < cut_end:
+                continue
+            # The same utterance can straddle the cut and be transcribed by both chunks
+            if merged and _normalize_text(merged[-1].get("text", "")) == _normalize_text(shifted.get("text", "")) \
+                    and shifted["start"] - merged[-1]["start"] < overlap_seconds:
+                merged[-1]["end"] = max(merged[-1]["end"], shifted["end"])
+                continue
+            merged.append(shifted)
+    return merged
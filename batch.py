@@ -0,0 +1,199 @@
+"""Analyze a directory or manifest of call recordings without the Streamlit UI.
+
+    python batch.py recordings/ -o results.jsonl --workers 8 --rate 5
+    python batch.py manifest.txt -o results.jsonl --parquet results.parquet
+
+Each finished recording is appended to the JSONL output immediately, so the
+output doubles as the checkpoint: rerunning the same command skips recordings
+that already succeeded and retries the ones that failed, including recordings
+that were transcribed but had an analysis section fail ("partial").
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+
+import main as app
+
+
+AUDIO_EXTENSIONS = (".mp3", ".wav")
+
+
+def is_url(source):
+    return source.startswith(("http://", "https://"))
+
+def discover_sources(input_path):
+    """List recordings from a directory, a text manifest (one path or URL per line) or a JSONL manifest"""
+    if os.path.isdir(input_path):
+        sources = []
+        for root, _, files in os.walk(input_path):
+            for name in files:
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    sources.append(os.path.join(root, name))
+        return sorted(sources)
+
+    sources = []
+    base_dir = os.path.dirname(os.path.abspath(input_path))
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                entry = json.loads(line)
+                line = entry.get("url") or entry.get("path")
+                if not line:
+                    continue
+            if not is_url(line) and not os.path.isabs(line):
+                line = os.path.join(base_dir, line)
+            sources.append(line)
+    return sources
+
+def load_checkpoint(output_path):
+    """Return the sources already processed successfully in an existing output file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A partially written last line from an interrupted run
+                continue
+            if record.get("status") == "ok":
+                done.add(record["source"])
+    return done
+
+def process_recording(source, api_key, mode=None):
+    """Transcribe, segment and analyze one recording and return a JSON-serializable record"""
+    started = time.perf_counter()
+    record = {"source": source, "status": "error", "error": None}
+
+    if is_url(source):
+        result, error = app.transcribe_audio(audio_url=source, api_key=api_key)
+    else:
+        with open(source, "rb") as audio_file:
+            result, error = app.transcribe_audio(audio_file=audio_file, api_key=api_key)
+
+    if error:
+        record["error"] = error
+        record["elapsed"] = time.perf_counter() - started
+        return record
+
+    transcript = result.get("text", "")
+    segments = result.get("segments", [])
+    call_stages = app.segment_call(segments)
+    analysis = app.analyze_call(transcript, segments, mode=mode, api_key=api_key)
+
+    # A section that failed or ran out of time leaves the record "partial" so a rerun retries it
+    failed = [
+        name for name in app.ANALYSIS_PROMPTS
+        if analysis[name] in (app.ANALYSIS_ERRORS.get(name), app.ANALYSIS_DEADLINE_MESSAGE)
+    ]
+    record.update({
+        "status": "partial" if failed else "ok",
+        "error": f"Analysis failed: {', '.join(failed)}" if failed else None,
+        "transcript": transcript,
+        "segments": segments,
+        "stage_segment_counts": {stage: len(stage_segments) for stage, stage_segments in call_stages.items()},
+        "metrics": app.extract_call_metrics(transcript, segments),
+        "objections": analysis["objections"],
+        "competitors": analysis["competitors"],
+        "scoring": analysis["scoring"],
+        "scores": analysis["scores"],
+        "coaching": analysis["coaching"],
+        "analysis_stats": analysis["stats"],
+        "silence_trim": result.get("silence_trim"),
+        "compression": result.get("compression"),
+        "elapsed": time.perf_counter() - started
+    })
+    return record
+
+def export_parquet(jsonl_path, parquet_path):
+    """Convert the JSONL results to Parquet (requires pyarrow or fastparquet)"""
+    df = pd.read_json(jsonl_path, lines=True)
+    # A source retried on resume has a row per attempt; rows are appended in order, so the last one is current
+    df = df.drop_duplicates("source", keep="last")
+    # Nested columns are stored as JSON strings so any Parquet reader can scan them
+    for column in ("segments", "stage_segment_counts", "metrics", "scores", "analysis_stats", "silence_trim", "compression"):
+        if column in df:
+            df[column] = df[column].map(lambda value: json.dumps(value) if isinstance(value, (dict, list)) else value)
+    df.to_parquet(parquet_path, index=False)
+
+def run_batch(sources, output_path, api_key, workers=4, mode=None, progress=True):
+    """Process sources with a bounded worker pool, appending each result to output_path as it finishes"""
+    done = load_checkpoint(output_path)
+    pending = [source for source in sources if source not in done]
+    counts = {"ok": 0, "partial": 0, "error": 0, "skipped": len(sources) - len(pending)}
+    started = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as executor:
+        queue = iter(pending)
+        in_flight = {}
+
+        def submit_next():
+            source = next(queue, None)
+            if source is not None:
+                in_flight[executor.submit(process_recording, source, api_key, mode)] = source
+
+        # Keep at most two recordings per worker queued so memory stays flat on huge manifests
+        for _ in range(workers * 2):
+            submit_next()
+
+        try:
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    source = in_flight.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        record = {"source": source, "status": "error", "error": f"Exception: {str(e)}"}
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    counts[record["status"]] += 1
+                    if progress:
+                        processed = counts["ok"] + counts["partial"] + counts["error"]
+                        rate = processed / (time.perf_counter() - started)
+                        print(f"[{processed}/{len(pending)}] {record['status']:7s} {source} ({rate:.2f} calls/s)", file=sys.stderr)
+                    submit_next()
+        except KeyboardInterrupt:
+            for future in in_flight:
+                future.cancel()
+            print("Interrupted; rerun the same command to resume.", file=sys.stderr)
+            raise
+
+    counts["elapsed"] = time.perf_counter() - started
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-analyze sales call recordings with RepRadar")
+    parser.add_argument("input", help="Directory of .mp3/.wav files, or a manifest of paths/URLs (.txt or .jsonl)")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results file; also used as the resume checkpoint")
+    parser.add_argument("--parquet", help="Also export the results to this Parquet file when the run finishes")
+    parser.add_argument("--workers", type=int, default=4, help="Recordings processed concurrently")
+    parser.add_argument("--rate", type=float, default=app.RATE_LIMIT, help="Max API requests per second across all workers (0 = unlimited)")
+    parser.add_argument("--mode", choices=list(app.ANALYSIS_MODES.keys()), default=app.ANALYSIS_MODE, help="Analysis mode")
+    parser.add_argument("--api-key", default=app.DEFAULT_MISTRAL_API_KEY, help="Mistral API key (defaults to MISTRAL_API_KEY)")
+    parser.add_argument("--quiet", action="store_true", help="Don't print per-recording progress")
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("A Mistral API key is required: pass --api-key or set MISTRAL_API_KEY")
+
+    app.get_mistral_client().set_rate_limit(args.rate)
+    sources = discover_sources(args.input)
+    counts = run_batch(sources, args.output, args.api_key, workers=args.workers, mode=args.mode, progress=not args.quiet)
+    print(f"Done: {counts['ok']} ok, {counts['partial']} partially analyzed, {counts['error']} failed, {counts['skipped']} already processed in {counts['elapsed']:.1f}s", file=sys.stderr)
+
+    if args.parquet:
+        export_parquet(args.output, args.parquet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Measure upload compression (mono, 16 kHz, re-encoded) on sample WAV/MP3 files.
+
+    python benchmarks/compression_bench.py                     # synthetic 44.1 kHz stereo WAVs
+    python benchmarks/compression_bench.py calls/*.wav calls/*.mp3 --mbps 20
+
+MP3 input and MP3 output need ffmpeg; without it WAV input is converted to 16-bit PCM WAV and
+MP3 input is reported as skipped. Upload time is estimated at the given uplink bandwidth.
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_processing import compress_audio, compression_format, NATIVE_SAMPLE_RATE
+
+
+def synthetic_wav(path, seconds, sample_rate=44100, channels=2, seed=0):
+    """Write a speech-band test recording: voiced tones, noise bursts and pauses"""
+    rng = np.random.default_rng(seed)
+    with wave.open(path, "wb") as target:
+        target.setnchannels(channels)
+        target.setsampwidth(2)
+        target.setframerate(sample_rate)
+        for second in range(int(seconds)):
+            t = np.arange(sample_rate) / sample_rate
+            pitch = rng.uniform(90, 250)
+            voiced = sum(np.sin(2 * np.pi * pitch * harmonic * t) / harmonic for harmonic in range(1, 8))
+            samples = 0.2 * voiced * (rng.random() > 0.2) + 0.02 * rng.standard_normal(sample_rate)
+            frames = np.repeat((np.clip(samples, -1, 1) * 32767).astype("<i2")[:, None], channels, axis=1)
+            target.writeframes(frames.tobytes())
+
+def measure(path, sample_rate, bitrate, mbps):
+    with open(path, "rb") as source:
+        format = compression_format(source)
+        if format is None:
+            return None
+        with tempfile.TemporaryFile() as output:
+            tracemalloc.start()
+            started = time.perf_counter()
+            compress_audio(source, output, sample_rate=sample_rate, bitrate=bitrate)
+            encode_seconds = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            compressed_bytes = output.seek(0, os.SEEK_END)
+
+    original_bytes = os.path.getsize(path)
+    bytes_per_second = mbps * 1e6 / 8
+    return {
+        "format": format,
+        "original_bytes": original_bytes,
+        "compressed_bytes": compressed_bytes,
+        "encode_seconds": encode_seconds,
+        "peak_bytes": peak,
+        "seconds_saved": (original_bytes - compressed_bytes) / bytes_per_second - encode_seconds
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="WAV or MP3 files (default: generated WAVs)")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 10, 30], help="Lengths of the generated WAVs")
+    parser.add_argument("--sample-rate", type=int, default=NATIVE_SAMPLE_RATE)
+    parser.add_argument("--bitrate", default="32k")
+    parser.add_argument("--mbps", type=float, default=10.0, help="Uplink bandwidth used to estimate upload time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = args.files
+        if not files:
+            files = []
+            for minutes in args.minutes:
+                path = os.path.join(directory, f"synthetic_{minutes:g}min.wav")
+                synthetic_wav(path, minutes * 60)
+                files.append(path)
+
+        print(f"{'file':<28} {'original':>10} {'uploaded':>10} {'ratio':>7} {'encode':>8} {'peak mem':>9} {'time saved':>11}")
+        for path in files:
+            result = measure(path, args.sample_rate, args.bitrate, args.mbps)
+            name = os.path.basename(path)[:28]
+            if result is None:
+                print(f"{name:<28} skipped (needs ffmpeg)")
+                continue
+            print(
+                f"{name:<28} {result['original_bytes'] / 1e6:>8.1f}MB {result['compressed_bytes'] / 1e6:>8.1f}MB "
+                f"{result['original_bytes'] / result['compressed_bytes']:>6.1f}x {result['encode_seconds']:>7.2f}s "
+                f"{result['peak_bytes'] / 1e6:>7.1f}MB {result['seconds_saved']:>10.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
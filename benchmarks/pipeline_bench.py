@@ -0,0 +1,261 @@
+"""Time the whole call pipeline offline against the mock Mistral server and save the results as JSON.
+
+    python benchmarks/pipeline_bench.py --segments 10 1000 50000 --iterations 20 -o bench.json
+    python benchmarks/pipeline_bench.py --latency 0.3 --latency-dist lognormal --latency-spread 0.6 \\
+        --error-rate 0.02 --throttle-rate 0.05 --compare bench.json
+
+Every stage (transcription, segmentation, metrics, analysis and each results tab) is timed
+per iteration and reported as p50/p95/p99. Peak Python memory per stage comes from a separate
+tracemalloc pass so that tracing does not skew the timings. Tabs are rendered through AppTest
+with the figure caches cleared before every rerun unless --warm is given. The response and
+transcription caches are disabled so every request reaches the mock.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mock_mistral import start_mock_server, synthetic_transcription, LATENCY_DISTRIBUTIONS
+
+STAGES = ("transcribe_audio", "segment_call", "build_segment_store", "extract_call_metrics", "analyze_call")
+
+TABS = ("transcript", "overview", "objections", "performance", "coaching")
+
+TAB_SCRIPT = """
+import streamlit as st
+import main
+from mock_mistral import synthetic_transcription
+
+main.init_session_state()
+if not st.session_state.transcript:
+    result = synthetic_transcription({segments})
+    main.load_call_transcript(result["text"], result["segments"])
+    st.session_state.rep_scores = {{"structure": 7, "clarity": 6, "confidence": 8, "closing": 5}}
+    st.session_state.objections = "- Price"
+    st.session_state.coaching_tips = "1. Confirm next steps"
+if {cold}:
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    st.session_state.segment_store = main.build_segment_store(st.session_state.segments)
+    st.session_state.segment_store_segments = st.session_state.segments
+    st.session_state.lexicon_scan = None
+main.render_{tab}_tab()
+"""
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile of a list of numbers"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def summarize(timings, errors, peak_bytes):
+    if not timings:
+        return {"n": 0, "errors": errors, "peak_bytes": peak_bytes}
+    return {
+        "n": len(timings),
+        "errors": errors,
+        "p50": percentile(timings, 50),
+        "p95": percentile(timings, 95),
+        "p99": percentile(timings, 99),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+        "peak_bytes": peak_bytes
+    }
+
+def traced_peak(fn):
+    """Run fn once under tracemalloc and return the peak traced allocation in bytes"""
+    tracemalloc.start()
+    try:
+        fn()
+    except Exception:
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def pipeline_stages(main, audio, mode):
+    """Return (name, fn) pairs for one pass of the pipeline; each fn raises on a failed request"""
+    state = {}
+
+    def transcribe():
+        audio.seek(0)
+        result, error = main.transcribe_audio(
+            audio_file=audio, api_key="mock", use_cache=False, long_audio=False, remove_silence=False, compress=False
+        )
+        if error:
+            raise RuntimeError(error)
+        state["transcript"], state["segments"] = result["text"], result["segments"]
+
+    def segment():
+        main.segment_call(state["segments"])
+
+    def store():
+        state["store"] = main.build_segment_store(state["segments"])
+
+    def metrics():
+        main.extract_call_metrics(state["transcript"], state["segments"], store=state["store"])
+
+    def analyze():
+        results = main.analyze_call(state["transcript"], state["segments"], mode=mode, api_key="mock")
+        failed = [name for name in main.ANALYSIS_PROMPTS if results[name] == main.ANALYSIS_ERRORS.get(name)]
+        if failed:
+            raise RuntimeError(f"Analysis failed: {', '.join(failed)}")
+
+    return list(zip(STAGES, (transcribe, segment, store, metrics, analyze)))
+
+def bench_pipeline(main, segments, iterations, mode, audio_bytes):
+    audio = io.BytesIO(os.urandom(audio_bytes))
+    audio.name = "bench.mp3"
+    stages = pipeline_stages(main, audio, mode)
+    timings = {name: [] for name, _ in stages}
+    errors = dict.fromkeys(timings, 0)
+
+    for _ in range(iterations):
+        for name, fn in stages:
+            started = time.perf_counter()
+            try:
+                fn()
+            except Exception:
+                errors[name] += 1
+                # Later stages need this one's output
+                break
+            timings[name].append(time.perf_counter() - started)
+
+    peaks = {name: traced_peak(fn) for name, fn in stages}
+    return {name: summarize(timings[name], errors[name], peaks[name]) for name in timings}
+
+def bench_tab(tab, segments, iterations, warm):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_string(TAB_SCRIPT.format(segments=segments, cold=not warm, tab=tab), default_timeout=600)
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    timings, errors = [], 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        app.run()
+        if app.exception:
+            errors += 1
+            continue
+        timings.append(time.perf_counter() - started)
+    return summarize(timings, errors, traced_peak(app.run))
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def max_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+def print_report(report, baseline=None):
+    print(f"{'segments':>9} {'stage':<22} {'p50':>9} {'p95':>9} {'p99':>9} {'peak mem':>9} {'errors':>6}" + (f" {'p50 vs base':>12}" if baseline else ""))
+    for segments, stages in report["results"].items():
+        for name, result in stages.items():
+            if not result["n"]:
+                print(f"{segments:>9} {name:<22} {'no successful runs':>29} {result['peak_bytes'] / 1e6:>7.1f}MB {result['errors']:>6}")
+                continue
+            line = (
+                f"{segments:>9} {name:<22} {result['p50'] * 1000:>7.1f}ms {result['p95'] * 1000:>7.1f}ms "
+                f"{result['p99'] * 1000:>7.1f}ms {result['peak_bytes'] / 1e6:>7.1f}MB {result['errors']:>6}"
+            )
+            base = (baseline or {}).get("results", {}).get(segments, {}).get(name)
+            if base and base.get("n"):
+                line += f" {(result['p50'] / base['p50'] - 1) * 100:>+11.0f}%"
+            print(line)
+    server = report["server"]
+    print(f"\nmock server: {server['requests']} requests, {server['errors']} errors, {server['throttled']} throttled")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, nargs="+", default=[10, 1000, 10000, 50000], help="Transcript sizes to benchmark")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--mode", choices=["structured", "per_prompt"], help="Analysis mode (default: the app's)")
+    parser.add_argument("--audio-mb", type=float, default=1.0, help="Size of the uploaded audio")
+    parser.add_argument("--latency", type=float, default=0.05, help="Median mock response delay in seconds")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--latency-spread", type=float, default=0.0)
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Delay between streamed tokens")
+    parser.add_argument("--prompt-latency", type=float, default=0.0, help="Extra mock delay per 1,000 prompt tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tabs", nargs="*", choices=TABS, default=list(TABS), help="Results tabs to render (none to skip)")
+    parser.add_argument("--warm", action="store_true", help="Keep the figure caches between tab reruns")
+    parser.add_argument("-o", "--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="A previous JSON report to compare p50s against")
+    args = parser.parse_args()
+
+    server = start_mock_server(
+        latency=args.latency, token_latency=args.token_latency, latency_dist=args.latency_dist,
+        latency_spread=args.latency_spread, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after, seed=args.seed, prompt_latency=args.prompt_latency
+    )
+    # main reads these at import time
+    os.environ["MISTRAL_API_BASE"] = server.base_url
+    os.environ["REPRADAR_RESPONSE_CACHE"] = "none"
+    os.chdir(ROOT)
+    import main as app
+
+    results, client_metrics = {}, {}
+    for segments in args.segments:
+        server.segments = segments
+        # Build the synthetic response before timing starts
+        synthetic_transcription(segments)
+        results[str(segments)] = bench_pipeline(app, segments, args.iterations, args.mode, int(args.audio_mb * 1024 * 1024))
+        # Rendering with cold caches replaces the shared client, so snapshot its counters first
+        client_metrics[str(segments)] = app.get_mistral_client().metrics()
+        for tab in args.tabs:
+            results[str(segments)][f"render_{tab}_tab"] = bench_tab(tab, segments, args.iterations, args.warm)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+            "max_rss_bytes": max_rss_bytes()
+        },
+        "server": dict(server.stats),
+        "client": client_metrics,
+        "results": results
+    }
+    server.shutdown()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
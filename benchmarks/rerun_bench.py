@@ -0,0 +1,78 @@
+"""Time Streamlit reruns of the results tabs on a large call, with and without the memoized figures.
+
+    python benchmarks/rerun_bench.py --segments 2000 10000
+
+"cold" clears the figure caches before every rerun, which is what every rerun cost before
+they existed. "warm" is a full-app rerun with the caches filled. "settings" is what now
+reruns when the API key or analysis settings change: only the settings fragment.
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+
+
+RESULTS_SCRIPT = """
+import streamlit as st
+import main
+from mock_mistral import synthetic_transcription
+
+main.init_session_state()
+if not st.session_state.transcript:
+    result = synthetic_transcription({segments})
+    main.load_call_transcript(result["text"], result["segments"])
+    st.session_state.rep_scores = {{"structure": 7, "clarity": 6, "confidence": 8, "closing": 5}}
+    st.session_state.objections = "- Price"
+    st.session_state.coaching_tips = "1. Confirm next steps"
+if {cold}:
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    st.session_state.segment_store = main.build_segment_store(st.session_state.segments)
+    st.session_state.segment_store_segments = st.session_state.segments
+    st.session_state.lexicon_scan = None
+main.render_results_tabs()
+"""
+
+SETTINGS_SCRIPT = """
+import main
+main.init_session_state()
+main.render_api_settings()
+"""
+
+
+def time_reruns(script, repeat):
+    app = AppTest.from_string(script, default_timeout=600)
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    settings = time_reruns(SETTINGS_SCRIPT, args.repeat)
+
+    print(f"{'segments':>9} {'cold rerun':>11} {'warm rerun':>11} {'settings':>9} {'speedup':>8}")
+    for n in args.segments:
+        cold = time_reruns(RESULTS_SCRIPT.format(segments=n, cold=True), args.repeat)
+        warm = time_reruns(RESULTS_SCRIPT.format(segments=n, cold=False), args.repeat)
+        print(f"{n:>9} {cold * 1000:>9.1f}ms {warm * 1000:>9.1f}ms {settings * 1000:>7.1f}ms {cold / warm:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
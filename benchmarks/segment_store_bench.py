@@ -0,0 +1,87 @@
+"""Compare the per-segment Python loops the tabs used to run with SegmentStore reductions.
+
+    python benchmarks/segment_store_bench.py --segments 10000 50000
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_mistral import synthetic_transcription
+from segment_store import SegmentStore, CALL_STAGES
+
+
+def legacy_stage_split(segments):
+    n = len(segments)
+    bounds = [0, max(1, int(n * 0.15)), max(2, int(n * 0.4)), max(3, int(n * 0.65)), max(4, int(n * 0.85)), n]
+    return {stage: segments[bounds[i]:bounds[i + 1]] for i, stage in enumerate(CALL_STAGES)}
+
+def legacy_tabs(segments, call_stages):
+    """The work one rerun used to do across calculate_talk_ratio and the tabs"""
+    rep, customer = 0, 0
+    for i, segment in enumerate(segments):
+        duration = segment.get("end", 0) - segment.get("start", 0)
+        if i % 2 == 0:
+            rep += duration
+        else:
+            customer += duration
+    ratio = rep / (customer or 1)
+    rep_time, customer_time = 0, 0
+    for i, segment in enumerate(segments):
+        duration = segment.get("end", 0) - segment.get("start", 0)
+        if i % 2 == 0:
+            rep_time += duration
+        else:
+            customer_time += duration
+    rows = [{
+        "Start": f"{segment['start']:.1f}s",
+        "End": f"{segment['end']:.1f}s",
+        "Duration": f"{segment['end'] - segment['start']:.1f}s",
+        "Text": segment["text"]
+    } for segment in segments]
+    stage_texts = {stage: " ".join(s["text"] for s in call_stages[stage]) for stage in CALL_STAGES}
+    return ratio, rep_time, customer_time, rows, stage_texts
+
+def store_tabs(store):
+    """The same results computed from a cached SegmentStore"""
+    ratio = store.talk_ratio()
+    rep_time, customer_time = store.talk_time()
+    aggregates = store.stage_aggregates()
+    stage_texts = {stage: store.stage_text(stage) for stage in CALL_STAGES}
+    frame = store.to_frame()
+    return ratio, rep_time, customer_time, aggregates, stage_texts, frame
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'segments':>9} {'legacy rerun':>13} {'first build':>12} {'store rerun':>12} {'speedup':>8}")
+    for n in args.segments:
+        segments = synthetic_transcription(n)["segments"]
+        call_stages = legacy_stage_split(segments)
+        lengths = [len(call_stages[stage]) for stage in CALL_STAGES]
+        stage_index = [i for i, length in enumerate(lengths) for _ in range(length)]
+
+        legacy = best_of(lambda: legacy_tabs(segments, call_stages), args.repeat)
+        build = best_of(lambda: store_tabs(SegmentStore.from_segments(segments, stage_index)), args.repeat)
+        store = SegmentStore.from_segments(segments, stage_index)
+        rerun = best_of(lambda: store_tabs(store), args.repeat)
+
+        assert abs(legacy_tabs(segments, call_stages)[0] - store.talk_ratio()) < 1e-6
+        print(f"{n:>9} {legacy * 1000:>11.2f}ms {build * 1000:>10.2f}ms {rerun * 1000:>10.2f}ms {legacy / rerun:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
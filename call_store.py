@@ -0,0 +1,284 @@
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+
+import pandas as pd
+
+from cache import closing_connection
+from segment_store import SPEAKERS, CALL_STAGES
+
+
+# Summary columns returned by list_calls; transcripts and segments are only read when a call is opened
+CALL_SUMMARY_COLUMNS = (
+    "id", "call_date", "rep", "source", "duration", "word_count", "talk_ratio", "filler_words",
+    "structure", "clarity", "confidence", "closing", "created_at"
+)
+
+# Full-text search over segment text; the index follows the segments table through triggers
+SEARCH_SCHEMA = (
+    "CREATE VIRTUAL TABLE segments_fts USING fts5("
+    "text, content='segments', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2', prefix='2 3');"
+    "CREATE TRIGGER segments_fts_insert AFTER INSERT ON segments BEGIN "
+    "INSERT INTO segments_fts (rowid, text) VALUES (new.rowid, new.text); END;"
+    "CREATE TRIGGER segments_fts_delete AFTER DELETE ON segments BEGIN "
+    "INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.rowid, old.text); END;"
+    "INSERT INTO segments_fts (segments_fts) VALUES ('rebuild');"
+)
+
+SEARCH_TOKEN_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+# Above this many matching segments, relevance ranking costs more than it helps; show the newest first
+SEARCH_RANK_MAX_MATCHES = 20_000
+
+# Control characters around matched terms in search snippets, so callers can escape the text first
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+
+
+def search_query(text):
+    """Turn user input into an FTS5 query: "quoted phrases", prefix* terms and plain words, all required"""
+    terms = []
+    for phrase, word in SEARCH_TOKEN_PATTERN.findall(text):
+        if phrase:
+            words = re.findall(r"\w+", phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+            continue
+        prefix = word.endswith("*")
+        words = re.findall(r"\w+", word)
+        if words:
+            # Punctuation inside a word ("e-mail") becomes a phrase, like the tokenizer splits it
+            term = '"' + " ".join(words) + '"'
+            terms.append(term + "*" if prefix else term)
+    return " AND ".join(terms)
+
+
+class CallStore:
+    """SQLite store of analyzed calls, their segments and analysis results"""
+
+    # One row per call (metadata, metrics, analysis text and scores), one row per segment and one
+    # row per competitor mentioned. Listing and filtering calls reads only the indexed calls table;
+    # a call's segments are fetched by primary key when it is opened.
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS calls ("
+                "id TEXT PRIMARY KEY, created_at REAL NOT NULL, call_date TEXT NOT NULL, rep TEXT, source TEXT, "
+                "duration REAL, word_count INTEGER, talk_ratio REAL, filler_words INTEGER, "
+                "structure INTEGER, clarity INTEGER, confidence INTEGER, closing INTEGER, "
+                "transcript TEXT NOT NULL, objections TEXT, competitors TEXT, scoring TEXT, coaching TEXT, "
+                "analysis_stats TEXT);"
+                "CREATE TABLE IF NOT EXISTS segments ("
+                "call_id TEXT NOT NULL REFERENCES calls(id) ON DELETE CASCADE, idx INTEGER NOT NULL, "
+                "start REAL NOT NULL, end REAL NOT NULL, speaker TEXT NOT NULL, stage TEXT, text TEXT NOT NULL, "
+                "PRIMARY KEY (call_id, idx));"
+                "CREATE TABLE IF NOT EXISTS call_competitors ("
+                "call_id TEXT NOT NULL REFERENCES calls(id) ON DELETE CASCADE, name TEXT NOT NULL COLLATE NOCASE, "
+                "PRIMARY KEY (call_id, name));"
+                "CREATE INDEX IF NOT EXISTS calls_date ON calls (call_date);"
+                "CREATE INDEX IF NOT EXISTS calls_rep_date ON calls (rep, call_date);"
+                "CREATE INDEX IF NOT EXISTS segments_stage ON segments (stage, call_id);"
+                "CREATE INDEX IF NOT EXISTS call_competitors_name ON call_competitors (name);"
+            )
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'segments_fts'").fetchone() is None:
+                # Also indexes calls saved before search existed
+                conn.executescript(SEARCH_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return closing_connection(conn)
+
+    def save_call(self, transcript, store, analysis, metrics=None, source=None, rep=None, call_date=None):
+        """Persist a call from its transcript, SegmentStore and analyze_call results; returns the call ID
+
+        Competitors are indexed from the analysis["competitor_names"] list, which every analysis mode fills.
+        """
+        call_id = uuid.uuid4().hex
+        metrics = metrics or {}
+        scores = analysis.get("scores") or {}
+        stage_names = [CALL_STAGES[code] if code >= 0 else None for code in store.stage.tolist()]
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO calls (id, created_at, call_date, rep, source, duration, word_count, talk_ratio, filler_words, "
+                "structure, clarity, confidence, closing, transcript, objections, competitors, scoring, coaching, analysis_stats) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    call_id, time.time(), call_date or time.strftime("%Y-%m-%d"), rep or None, source,
+                    store.call_duration, metrics.get("word_count"), metrics.get("talk_ratio"), metrics.get("filler_words"),
+                    scores.get("structure"), scores.get("clarity"), scores.get("confidence"), scores.get("closing"),
+                    transcript, analysis.get("objections"), analysis.get("competitors"), analysis.get("scoring"),
+                    analysis.get("coaching"), json.dumps(analysis.get("stats") or {})
+                )
+            )
+            conn.executemany(
+                "INSERT INTO segments (call_id, idx, start, end, speaker, stage, text) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (call_id, i, start, end, SPEAKERS[speaker], stage, store.text(i))
+                    for i, (start, end, speaker, stage) in enumerate(
+                        zip(store.start.tolist(), store.end.tolist(), store.speaker.tolist(), stage_names)
+                    )
+                )
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO call_competitors (call_id, name) VALUES (?, ?)",
+                ((call_id, name) for name in analysis.get("competitor_names") or [])
+            )
+        return call_id
+
+    def list_calls(self, rep=None, since=None, until=None, competitor=None, limit=50):
+        """Return summaries of the most recent calls matching the filters, newest first"""
+        clauses, values = [], []
+        if rep:
+            clauses.append("rep = ?")
+            values.append(rep)
+        if since:
+            clauses.append("call_date >= ?")
+            values.append(str(since))
+        if until:
+            clauses.append("call_date <= ?")
+            values.append(str(until))
+        if competitor:
+            clauses.append("id IN (SELECT call_id FROM call_competitors WHERE name = ?)")
+            values.append(competitor)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(CALL_SUMMARY_COLUMNS)} FROM calls {where} "
+                "ORDER BY call_date DESC, created_at DESC LIMIT ?", (*values, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def reps(self):
+        """Return the distinct rep names"""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT rep FROM calls WHERE rep IS NOT NULL ORDER BY rep")]
+
+    def competitors(self):
+        """Return the distinct competitor names"""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT name FROM call_competitors ORDER BY name")]
+
+    def get_call(self, call_id):
+        """Return a call's metadata, transcript and analysis (without segments), or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM calls WHERE id = ?", (call_id,)).fetchone()
+        if row is None:
+            return None
+        call = dict(row)
+        call["analysis_stats"] = json.loads(call["analysis_stats"] or "{}")
+        call["scores"] = {criterion: call[criterion] for criterion in ("structure", "clarity", "confidence", "closing") if call[criterion] is not None}
+        return call
+
+    def get_segments(self, call_id, stage=None):
+        """Return a call's segments as transcription-style dicts, optionally only one stage"""
+        query = "SELECT start, end, text FROM segments WHERE call_id = ?"
+        values = [call_id]
+        if stage:
+            query += " AND stage = ?"
+            values.append(stage)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY idx", values).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, text, rep=None, since=None, until=None, speaker=None, limit=50):
+        """Return (hits, ranked): matching segments with their call and timestamps, best or newest first"""
+        query = search_query(text)
+        if not query:
+            return [], False
+        with self._connect() as conn:
+            matches = conn.execute("SELECT COUNT(*) FROM segments_fts WHERE segments_fts MATCH ?", (query,)).fetchone()[0]
+        ranked = matches <= SEARCH_RANK_MAX_MATCHES
+        clauses, values = ["segments_fts MATCH ?"], [query]
+        if rep:
+            clauses.append("c.rep = ?")
+            values.append(rep)
+        if since:
+            clauses.append("c.call_date >= ?")
+            values.append(str(since))
+        if until:
+            clauses.append("c.call_date <= ?")
+            values.append(str(until))
+        if speaker:
+            clauses.append("s.speaker = ?")
+            values.append(speaker)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT s.call_id, c.call_date, c.rep, c.source, s.idx, s.start, s.end, s.speaker, s.stage, "
+                "snippet(segments_fts, 0, char(2), char(3), '…', 24) AS snippet, bm25(segments_fts) AS score "
+                "FROM segments_fts JOIN segments AS s ON s.rowid = segments_fts.rowid "
+                "JOIN calls AS c ON c.id = s.call_id "
+                f"WHERE {' AND '.join(clauses)} ORDER BY {'score' if ranked else 'segments_fts.rowid DESC'} LIMIT ?",
+                (*values, limit)
+            ).fetchall()
+        return [dict(row) for row in rows], ranked
+
+    def delete_call(self, call_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM calls WHERE id = ?", (call_id,))
+
+    def export_parquet(self, directory, since=None, until=None, chunk_rows=250_000):
+        """Export calls and segments to Parquet files under directory (requires pyarrow or fastparquet)"""
+        os.makedirs(directory, exist_ok=True)
+        clauses, values = [], []
+        if since:
+            clauses.append("call_date >= ?")
+            values.append(str(since))
+        if until:
+            clauses.append("call_date <= ?")
+            values.append(str(until))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        paths = []
+        with self._connect() as conn:
+            calls = pd.read_sql_query(
+                f"SELECT c.*, (SELECT group_concat(name, '|') FROM call_competitors WHERE call_id = c.id) AS competitor_names "
+                f"FROM calls AS c {where}", conn, params=values
+            )
+            calls_path = os.path.join(directory, "calls.parquet")
+            calls.to_parquet(calls_path, index=False)
+            paths.append(calls_path)
+
+            # Segments are written in parts so months of calls never have to fit in memory at once
+            segment_dir = os.path.join(directory, "segments")
+            os.makedirs(segment_dir, exist_ok=True)
+            query = (
+                "SELECT s.call_id, c.call_date, c.rep, s.idx, s.start, s.end, s.speaker, s.stage, s.text "
+                f"FROM segments AS s JOIN calls AS c ON c.id = s.call_id {where.replace('call_date', 'c.call_date')} "
+                "ORDER BY c.call_date, s.call_id, s.idx"
+            )
+            for part, frame in enumerate(pd.read_sql_query(query, conn, params=values, chunksize=chunk_rows)):
+                for column in ("speaker", "stage"):
+                    frame[column] = frame[column].astype("category")
+                part_path = os.path.join(segment_dir, f"part-{part:05d}.parquet")
+                frame.to_parquet(part_path, index=False)
+                paths.append(part_path)
+        return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the RepRadar call store to Parquet")
+    parser.add_argument("output", help="Directory to write calls.parquet and segments/part-*.parquet to")
+    parser.add_argument("--db", default=os.getenv("REPRADAR_CALL_DB", ".repradar_cache/calls.sqlite"))
+    parser.add_argument("--since", help="First call date to export (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last call date to export (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    paths = CallStore(args.db).export_parquet(args.output, since=args.since, until=args.until)
+    print(f"Wrote {len(paths)} Parquet files to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
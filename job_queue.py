@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+
+from cache import closing_connection
+
+
+class JobLimitError(Exception):
+    """Raised when a user already has the maximum number of pending jobs"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler to stop a job that was cancelled"""
+
+
+class JobContext:
+    """Handle passed to a job handler for reporting progress and checking for cancellation"""
+
+    def __init__(self, queue, job_id, secrets):
+        self.queue = queue
+        self.job_id = job_id
+        self.secrets = secrets
+        self.partial = {}
+        self.lock = threading.Lock()
+
+    def secret(self, name):
+        """Return an in-memory secret passed at submit time (never persisted)"""
+        return self.secrets.get(name)
+
+    def cancelled(self):
+        return self.queue._cancel_requested(self.job_id)
+
+    def check_cancelled(self):
+        if self.cancelled():
+            raise JobCancelled()
+
+    def update(self, progress=None, partial=None):
+        """Persist a progress message and/or merge keys into the job's partial results"""
+        with self.lock:
+            if partial:
+                self.partial.update(partial)
+            self.queue._update(self.job_id, progress=progress, partial=self.partial if partial else None)
+
+
+class JobQueue:
+    """SQLite-backed job queue processed by a local worker pool"""
+
+    # Job state and results survive page reloads and app restarts. Several processes can share
+    # one database: each running job records the process that claimed it, which refreshes a
+    # heartbeat while it works, and only jobs whose heartbeat has gone stale (their process
+    # died) are requeued. Secrets such as API keys are held in memory only.
+
+    def __init__(self, db_path, handler, workers=2, max_pending_per_user=5, max_running_per_user=1, poll_interval=0.5,
+                 heartbeat_interval=10.0, stale_after=60.0, on_finish=None):
+        self.db_path = db_path
+        self.handler = handler
+        self.workers = workers
+        self.max_pending_per_user = max_pending_per_user
+        self.max_running_per_user = max_running_per_user
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        # Called with the job once it is succeeded, failed or cancelled, e.g. to delete its files
+        self.on_finish = on_finish
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._secrets = {}
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, user_id TEXT NOT NULL, status TEXT NOT NULL, payload TEXT NOT NULL, "
+                "progress TEXT, partial TEXT, result TEXT, error TEXT, cancel_requested INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL, owner TEXT, heartbeat_at REAL)"
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_user_status ON jobs (user_id, status)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return closing_connection(conn)
+
+    def start(self):
+        """Start the worker threads and the heartbeat for the jobs they run"""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"repradar-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="repradar-job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def submit(self, user_id, payload, secrets=None):
+        """Queue a job and return its ID; raises JobLimitError if the user has too many pending jobs"""
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                pending = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE user_id = ? AND status IN ('queued', 'running')", (user_id,)
+                ).fetchone()[0]
+                if pending >= self.max_pending_per_user:
+                    raise JobLimitError(f"You already have {pending} calls processing. Wait for one to finish or cancel it.")
+                conn.execute(
+                    "INSERT INTO jobs (id, user_id, status, payload, progress, created_at) VALUES (?, ?, 'queued', ?, 'Queued', ?)",
+                    (job_id, user_id, json.dumps(payload), time.time())
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self._secrets[job_id] = dict(secrets or {})
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Return the job as a dict with decoded payload, partial and result, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ("payload", "partial", "result"):
+            job[field] = json.loads(job[field]) if job[field] else None
+        return job
+
+    def list_jobs(self, user_id, limit=20):
+        """Return a user's most recent jobs without their results"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, status, progress, error, created_at, started_at, finished_at FROM jobs "
+                "WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def cancel(self, job_id):
+        """Cancel a queued job immediately, or ask a running job to stop at its next checkpoint"""
+        with self._connect() as conn:
+            cancelled = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', progress = 'Cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            ).rowcount
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        if cancelled:
+            self._secrets.pop(job_id, None)
+            if self.on_finish:
+                self.on_finish(self.get(job_id))
+
+    def _cancel_requested(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def _update(self, job_id, progress=None, partial=None):
+        assignments, values = [], []
+        if progress is not None:
+            assignments.append("progress = ?")
+            values.append(progress)
+        if partial is not None:
+            assignments.append("partial = ?")
+            values.append(json.dumps(partial))
+        if assignments:
+            with self._connect() as conn:
+                conn.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ?", (*values, job_id))
+
+    def _finish(self, job, status, progress, result=None, error=None):
+        with self._connect() as conn:
+            # A job requeued from under us (our heartbeat stalled) now belongs to someone else
+            finished = conn.execute(
+                "UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND owner = ?",
+                (status, progress, json.dumps(result) if result is not None else None, error, time.time(), job["id"], self.owner)
+            ).rowcount
+        self._secrets.pop(job["id"], None)
+        if finished and self.on_finish:
+            self.on_finish(job)
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._connect() as conn:
+                conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = 'running'", (time.time(), self.owner))
+
+    def _claim_next(self):
+        """Atomically move the oldest eligible queued job to running and return it"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs whose process stopped sending heartbeats (crashed or restarted) go back in the queue
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', progress = 'Requeued after restart', owner = NULL "
+                    "WHERE status = 'running' AND COALESCE(heartbeat_at, started_at, 0) < ?", (time.time() - self.stale_after,)
+                )
+                row = conn.execute(
+                    "SELECT id FROM jobs AS j WHERE status = 'queued' AND "
+                    "(SELECT COUNT(*) FROM jobs AS r WHERE r.user_id = j.user_id AND r.status = 'running') < ? "
+                    "ORDER BY created_at LIMIT 1", (self.max_running_per_user,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', progress = 'Starting', started_at = ?, owner = ?, heartbeat_at = ? WHERE id = ?",
+                        (time.time(), self.owner, time.time(), row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def _worker(self):
+        while not self._stop.is_set():
+            job = self._claim_next()
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            context = JobContext(self, job["id"], self._secrets.get(job["id"], {}))
+            try:
+                result = self.handler(job, context)
+            except JobCancelled:
+                self._finish(job, "cancelled", "Cancelled")
+            except Exception as e:
+                self._finish(job, "failed", "Failed", error=str(e))
+            else:
+                self._finish(job, "succeeded", "Done", result=result)
+            # Another job from the same user may now be eligible
+            self._wakeup.set()
@@ -0,0 +1,118 @@
+import re
+import html
+import json
+from collections import Counter
+
+
+# A trailing "*" matches any word ending ("price*" matches "price", "prices", "priced")
+DEFAULT_LEXICONS = {
+    "fillers": ["um", "uh", "like", "you know", "actually", "basically"],
+    "pricing": ["price*", "pricing", "cost*", "budget*", "expensive", "discount*"],
+    "competitors": ["competitor*", "alternative*", "other vendor*"],
+    "timeline": ["timeline*", "deadline*", "next quarter", "by the end of"],
+    "concerns": ["concern*", "issue*", "risk*", "worried"]
+}
+
+HIGHLIGHT_COLORS = {
+    "fillers": "#E5E7EB",
+    "pricing": "#FDE68A",
+    "competitors": "#FECACA",
+    "timeline": "#BFDBFE",
+    "concerns": "#DDD6FE"
+}
+
+
+def load_lexicons(path=None):
+    """Return the default lexicons, overridden or extended by a JSON file of {name: [terms]}"""
+    lexicons = {name: list(terms) for name, terms in DEFAULT_LEXICONS.items()}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            lexicons.update(json.load(f))
+    return lexicons
+
+def _term_pattern(term):
+    words = term.strip().split()
+    wildcard = words[-1].endswith("*")
+    if wildcard:
+        words[-1] = words[-1][:-1]
+    pattern = r"\s+".join(re.escape(word) for word in words)
+    return pattern + (r"\w*" if wildcard else "")
+
+
+class LexiconMatcher:
+    """Finds whole-word matches for several lexicons in a single regex pass per text"""
+
+    def __init__(self, lexicons):
+        self.lexicons = lexicons
+        self.names = list(lexicons)
+        alternations = []
+        for index, name in enumerate(self.names):
+            # Longest terms first so "you know" wins over shorter overlapping terms
+            terms = sorted(lexicons[name], key=len, reverse=True)
+            if terms:
+                alternations.append(f"(?P<l{index}>{'|'.join(_term_pattern(term) for term in terms)})")
+        self.pattern = re.compile(r"\b(?:" + "|".join(alternations) + r")\b", re.IGNORECASE) if alternations else None
+
+    def finditer(self, text):
+        """Yield (lexicon, start, end, matched_text) for every match in text"""
+        if self.pattern is None:
+            return
+        for match in self.pattern.finditer(text):
+            name = self.names[int(match.lastgroup[1:])]
+            yield name, match.start(), match.end(), match.group()
+
+    def count(self, text):
+        """Return {lexicon: match_count} for one text"""
+        counts = dict.fromkeys(self.names, 0)
+        for name, _, _, _ in self.finditer(text):
+            counts[name] += 1
+        return counts
+
+    def scan(self, texts):
+        """Scan each text once and return a LexiconScan with counts and match positions"""
+        matches = []
+        for index, text in enumerate(texts):
+            for name, start, end, matched in self.finditer(text):
+                matches.append((index, name, start, end, matched.lower()))
+        return LexiconScan(self.names, matches)
+
+
+class LexiconScan:
+    """Match positions from LexiconMatcher.scan as (text_index, lexicon, start, end, term) tuples"""
+
+    def __init__(self, names, matches):
+        self.names = names
+        self.matches = matches
+        self.by_text = {}
+        for match in matches:
+            self.by_text.setdefault(match[0], []).append(match)
+
+    def counts(self):
+        """Return {lexicon: match_count}"""
+        counts = dict.fromkeys(self.names, 0)
+        for _, name, _, _, _ in self.matches:
+            counts[name] += 1
+        return counts
+
+    def term_counts(self, lexicon):
+        """Return a Counter of the matched terms for one lexicon"""
+        return Counter(term for _, name, _, _, term in self.matches if name == lexicon)
+
+    def texts_matching(self, lexicons):
+        """Return the indices of texts with at least one match in any of the given lexicons"""
+        lexicons = set(lexicons)
+        return sorted(index for index, matches in self.by_text.items() if any(m[1] in lexicons for m in matches))
+
+    def highlight(self, index, text, lexicons=None):
+        """Return text HTML-escaped with <mark> tags around its matches"""
+        parts = []
+        position = 0
+        for _, name, start, end, _ in self.by_text.get(index, []):
+            if lexicons is not None and name not in lexicons:
+                continue
+            color = HIGHLIGHT_COLORS.get(name, "#FDE68A")
+            parts.append(html.escape(text[position:start]))
+            parts.append(f"<mark style='background-color:{color}' title='{name}'>{html.escape(text[start:end])}</mark>")
+            position = end
+        parts.append(html.escape(text[position:]))
+        return "".join(parts)
@@ -1,3 +1,4 @@
+import io
 import os
 import streamlit as st
 import requests
@@ -5,61 +6,341 @@ import json
 import pandas as pd
 import numpy as np
 import time
+import copy
+import uuid
+import shutil
+import tempfile
+import html
+import hashlib
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import plotly.graph_objects as go
-import plotly.express as px
 from dotenv import load_dotenv
 from datetime import datetime
+from audio_processing import load_audio, audio_duration, audio_windows, export_audio_window, stitch_segments, trim_silence, remap_segments, compress_audio, compression_format
+from uploads import downloaded_audio, MultipartStream, spooled_upload
+from mistral_client import MistralClient
+from segment_store import SegmentStore, CALL_STAGES, SPEAKERS
+from lexicon import LexiconMatcher, load_lexicons
+from job_queue import JobQueue, JobLimitError
+from call_store import CallStore, SNIPPET_START, SNIPPET_END
+from cache import TranscriptionCache, MemoryResponseCache, SQLiteResponseCache, make_response_key
+import tracing
+from tracing import TraceExporter
 
 load_dotenv()
 
 
-st.set_page_config(
-    page_title="RepRadar - AI-Powered Sales Call Intelligence",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+# Load Mistral API key from .env file as fallback
+DEFAULT_MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 
+# Base URL for the Mistral API; point it at a local mock to run offline
+MISTRAL_API_BASE = os.getenv("MISTRAL_API_BASE", "https://api.mistral.ai/v1").rstrip("/")
 
-# Initialize session state variables
-if 'uploaded_audio' not in st.session_state:
-    st.session_state.uploaded_audio = None
+# Requests per second allowed across every session in the process (0 disables the limiter)
+RATE_LIMIT = float(os.getenv("REPRADAR_RATE_LIMIT", "0"))
 
-if 'audio_url' not in st.session_state:
-    st.session_state.audio_url = ""
+# Retries for throttled (429) and transient (5xx, connection) failures, with jittered backoff
+MAX_RETRIES = int(os.getenv("REPRADAR_MAX_RETRIES", "4"))
 
-if 'transcript' not in st.session_state:
-    st.session_state.transcript = ""
+# Requests with replayable bodies that run past this quantile of the endpoint's recent latencies
+# are duplicated and the first reply wins (0 disables hedging)
+HEDGE_QUANTILE = float(os.getenv("REPRADAR_HEDGE_QUANTILE", "0.95"))
+# After this many consecutive failed requests an endpoint fails fast for BREAKER_COOLDOWN seconds
+BREAKER_THRESHOLD = int(os.getenv("REPRADAR_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("REPRADAR_BREAKER_COOLDOWN", "30"))
 
-if 'segments' not in st.session_state:
-    st.session_state.segments = []
+# Transcription model settings and on-disk transcription cache
+TRANSCRIPTION_MODEL = "voxtral-mini-2507"
+TIMESTAMP_GRANULARITIES = "segment"
+TRANSCRIPTION_CACHE_DIR = os.getenv("REPRADAR_CACHE_DIR", ".repradar_cache/transcripts")
+TRANSCRIPTION_CACHE_MAX_BYTES = int(os.getenv("REPRADAR_CACHE_MAX_MB", "512")) * 1024 * 1024
 
-if 'call_stages' not in st.session_state:
-    st.session_state.call_stages = {}
+# Uploads are streamed from disk in chunks of this size instead of being buffered whole
+UPLOAD_CHUNK_SIZE = int(float(os.getenv("REPRADAR_UPLOAD_CHUNK_MB", "1")) * 1024 * 1024)
 
-if 'objections' not in st.session_state:
-    st.session_state.objections = ""
+# Long-audio mode: uploads over LONG_AUDIO_MIN_MB are decoded and, if longer than one chunk,
+# split into overlapping windows that are transcribed concurrently and stitched back together
+LONG_AUDIO_ENABLED = os.getenv("REPRADAR_LONG_AUDIO", "1") == "1"
+LONG_AUDIO_MIN_BYTES = int(float(os.getenv("REPRADAR_LONG_AUDIO_MIN_MB", "10")) * 1024 * 1024)
+LONG_AUDIO_CHUNK_SECONDS = float(os.getenv("REPRADAR_LONG_AUDIO_CHUNK_SECONDS", "600"))
+LONG_AUDIO_OVERLAP_SECONDS = float(os.getenv("REPRADAR_LONG_AUDIO_OVERLAP_SECONDS", "5"))
+LONG_AUDIO_MAX_WORKERS = int(os.getenv("REPRADAR_LONG_AUDIO_WORKERS", "4"))
+LONG_AUDIO_CHUNK_RETRIES = int(os.getenv("REPRADAR_LONG_AUDIO_RETRIES", "2"))
 
-if 'competitor_mentions' not in st.session_state:
-    st.session_state.competitor_mentions = ""
+# Optional silence trimming: uploads are decoded locally, silences longer than SILENCE_MIN_SECONDS
+# (below SILENCE_THRESHOLD_DB) are cut before upload and segment timestamps are mapped back
+SILENCE_TRIM_ENABLED = os.getenv("REPRADAR_TRIM_SILENCE", "0") == "1"
+SILENCE_THRESHOLD_DB = float(os.getenv("REPRADAR_SILENCE_THRESHOLD_DB", "-45"))
+SILENCE_MIN_SECONDS = float(os.getenv("REPRADAR_SILENCE_MIN_SECONDS", "2"))
+SILENCE_PADDING_SECONDS = 0.25
+# Upload the original file unless trimming saves at least this much audio
+SILENCE_MIN_SAVED_SECONDS = 5.0
 
-if 'rep_scores' not in st.session_state:
-    st.session_state.rep_scores = {}
+# Before upload, audio is downmixed to mono, resampled to the model's native rate and re-encoded
+# (MP3 via ffmpeg when installed, otherwise 16-bit PCM WAV for WAV input). On by default for
+# uploads; URLs can be downloaded and compressed too, which only pays off for large WAV links.
+COMPRESS_UPLOADS = os.getenv("REPRADAR_COMPRESS_UPLOADS", "1") == "1"
+COMPRESS_URLS = os.getenv("REPRADAR_COMPRESS_URLS", "0") == "1"
+# A URL download slower than this is abandoned and the URL is sent to the API as is
+COMPRESS_DOWNLOAD_SECONDS = float(os.getenv("REPRADAR_COMPRESS_DOWNLOAD_SECONDS", "120"))
+COMPRESS_SAMPLE_RATE = int(os.getenv("REPRADAR_COMPRESS_SAMPLE_RATE", "16000"))
+COMPRESS_BITRATE = os.getenv("REPRADAR_COMPRESS_BITRATE", "32k")
+# Upload the original unless compression shrinks it to at most this fraction of its size
+COMPRESS_MAX_RATIO = 0.8
 
-if 'coaching_tips' not in st.session_state:
-    st.session_state.coaching_tips = ""
+# Optional JSON file of {lexicon: [terms]} that overrides or extends the built-in keyword lexicons
+LEXICONS_PATH = os.getenv("REPRADAR_LEXICONS")
 
-if 'processing' not in st.session_state:
-    st.session_state.processing = False
+# Lexicons whose matches are surfaced in the Key Topics & Highlights section
+HIGHLIGHT_LEXICONS = ["pricing", "competitors", "timeline", "concerns"]
 
-if 'api_key' not in st.session_state:
-    st.session_state.api_key = ""
+# Chat response cache: "sqlite" is shared across worker processes, "memory" is per process, "off" disables it
+RESPONSE_CACHE_BACKEND = os.getenv("REPRADAR_RESPONSE_CACHE", "sqlite")
+RESPONSE_CACHE_PATH = os.getenv("REPRADAR_RESPONSE_CACHE_PATH", ".repradar_cache/responses.sqlite")
+RESPONSE_CACHE_TTL = float(os.getenv("REPRADAR_RESPONSE_CACHE_TTL", "86400"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("REPRADAR_RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+# Analysis prompts sent to the chat endpoint, keyed by the result field they fill
+ANALYSIS_PROMPTS = {
+    "objections": "Analyze this sales call transcript and list the top 3 customer objections. Format as bullet points.",
+    "competitors": "Identify any competitor names or products mentioned in this call. Format as a bulleted list. "
+                   "End with one line that starts with COMPETITOR_NAMES: followed by the names as a JSON array of strings ([] if none).",
+    "scoring": "Evaluate the salesperson on structure, clarity, confidence, and closing technique. Give a score out of 10 for each criterion and brief explanation.",
+    "coaching": "Provide 3 specific coaching tips to improve this sales call. Focus on handling objections better, clearer messaging, and effective closing."
+}
+
+# Marks the machine-readable line the per-prompt competitors reply ends with
+COMPETITOR_NAMES_MARKER = "COMPETITOR_NAMES:"
+
+ANALYSIS_ERRORS = {
+    "objections": "Error analyzing objections",
+    "competitors": "Error analyzing competitor mentions",
+    "scoring": "Error analyzing rep performance",
+    "coaching": "Error generating coaching tips"
+}
+
+# Concurrency cap and per-request timeout (seconds) for analysis prompts
+ANALYSIS_MAX_WORKERS = int(os.getenv("REPRADAR_ANALYSIS_WORKERS", "4"))
+ANALYSIS_TIMEOUT = float(os.getenv("REPRADAR_ANALYSIS_TIMEOUT", "120"))
+# Whole-analysis budget in seconds: sections still missing when it runs out are reported as such
+# and whatever finished (or streamed) in time is kept
+ANALYSIS_DEADLINE = float(os.getenv("REPRADAR_ANALYSIS_DEADLINE", "240"))
+ANALYSIS_DEADLINE_MESSAGE = "Not analyzed: the analysis ran out of time."
+
+# Map-reduce analysis for long calls: transcripts estimated above MAP_REDUCE_MIN_TOKENS are split on
+# stage and segment boundaries into chunks of at most MAP_REDUCE_CHUNK_TOKENS, each chunk is analyzed
+# in parallel (MAP_REDUCE_WORKERS at a time) and the findings are merged by one final request
+MAP_REDUCE_MIN_TOKENS = int(os.getenv("REPRADAR_MAP_REDUCE_MIN_TOKENS", "24000"))
+MAP_REDUCE_CHUNK_TOKENS = int(os.getenv("REPRADAR_MAP_REDUCE_CHUNK_TOKENS", "6000"))
+MAP_REDUCE_WORKERS = int(os.getenv("REPRADAR_MAP_REDUCE_WORKERS", "8"))
+# Rough token estimate for English transcripts, used to size requests before sending them
+CHARS_PER_TOKEN = 4
+
+# Stream chat completion tokens into the result tabs as they arrive (per-prompt mode only, so off by default)
+STREAM_ANALYSIS = os.getenv("REPRADAR_STREAM_ANALYSIS", "0") == "1"
+
+# Persistent call-processing jobs: SQLite state, local worker pool and per-user limits
+JOB_DB_PATH = os.getenv("REPRADAR_JOB_DB", ".repradar_cache/jobs.sqlite")
+JOB_UPLOAD_DIR = os.getenv("REPRADAR_JOB_UPLOAD_DIR", ".repradar_cache/job_uploads")
+JOB_WORKERS = int(os.getenv("REPRADAR_JOB_WORKERS", "4"))
+JOB_MAX_PENDING_PER_USER = int(os.getenv("REPRADAR_JOB_MAX_PENDING_PER_USER", "3"))
+JOB_MAX_RUNNING_PER_USER = int(os.getenv("REPRADAR_JOB_MAX_RUNNING_PER_USER", "1"))
+JOB_POLL_INTERVAL = float(os.getenv("REPRADAR_JOB_POLL_SECONDS", "1"))
+# Minimum seconds between persisting streamed analysis text
+JOB_PARTIAL_FLUSH_INTERVAL = 0.5
+
+# Durable store of analyzed calls (export with: python call_store.py exports/)
+CALL_DB_PATH = os.getenv("REPRADAR_CALL_DB", ".repradar_cache/calls.sqlite")
+CALL_HISTORY_LIMIT = 50
+
+# Calls whose charts stay memoized in memory, across all sessions
+FIGURE_CACHE_ENTRIES = int(os.getenv("REPRADAR_FIGURE_CACHE_ENTRIES", "32"))
+
+# Most spans drawn on the call timeline; longer calls are merged to fit (see SegmentStore.timeline_spans)
+TIMELINE_MAX_SPANS = int(os.getenv("REPRADAR_TIMELINE_MAX_SPANS", "400"))
+# Rows per page in the transcript table; only the visible page is sent to the browser
+TRANSCRIPT_PAGE_SIZES = [25, 50, 100, 250]
+STAGE_PREVIEW_CHARS = 2000
+
+STAGE_COLORS = {"intro": "#636EFA", "discovery": "#EF553B", "demo": "#00CC96", "objections": "#AB63FA", "closing": "#FFA15A"}
+SEARCH_RESULT_LIMIT = 100
+
+# Each processed call and each results-tab render is traced; the spans feed the debug panel and,
+# when configured, an OTLP/JSON lines file, an OTLP/HTTP endpoint (e.g. http://collector:4318/v1/traces)
+# and a Prometheus textfile. Only call traces are exported; renders just add to the metrics.
+TRACING_ENABLED = os.getenv("REPRADAR_TRACING", "1") == "1"
+TRACE_FILE = os.getenv("REPRADAR_TRACE_FILE")
+OTLP_ENDPOINT = os.getenv("REPRADAR_OTLP_ENDPOINT")
+METRICS_PATH = os.getenv("REPRADAR_METRICS_PATH")
+
+# "structured" asks for every section in one JSON response, "per_prompt" sends ANALYSIS_PROMPTS separately
+ANALYSIS_MODES = {
+    "structured": "Single structured request",
+    "per_prompt": "Separate prompt per section"
+}
+ANALYSIS_MODE = os.getenv("REPRADAR_ANALYSIS_MODE", "structured")
+
+SCORE_CRITERIA = ["structure", "clarity", "confidence", "closing"]
+
+STRUCTURED_ANALYSIS_PROMPT = (
+    "Analyze this sales call transcript and respond with JSON only. Include the top 3 customer objections, "
+    "any competitor names or products mentioned, a score out of 10 with a brief explanation for the salesperson's "
+    "structure, clarity, confidence, and closing technique, and 3 specific coaching tips focused on handling "
+    "objections better, clearer messaging, and effective closing."
+)
+
+STRUCTURED_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "objections": {"type": "array", "items": {"type": "string"}},
+        "competitors": {"type": "array", "items": {"type": "string"}},
+        "scores": {
+            "type": "object",
+            "properties": {
+                criterion: {
+                    "type": "object",
+                    "properties": {
+                        "score": {"type": "integer", "minimum": 0, "maximum": 10},
+                        "explanation": {"type": "string"}
+                    },
+                    "required": ["score", "explanation"]
+                }
+                for criterion in SCORE_CRITERIA
+            },
+            "required": SCORE_CRITERIA
+        },
+        "coaching_tips": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["objections", "competitors", "scores", "coaching_tips"]
+}
 
-# Load Mistral API key from .env file as fallback
-DEFAULT_MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 
+CHUNK_ANALYSIS_PROMPT = (
+    "This is one excerpt from a longer sales call transcript. Respond with JSON only. List the customer "
+    "objections raised and any competitor names or products mentioned in this excerpt. Score the salesperson "
+    "out of 10 on structure, clarity, confidence, and closing technique with a brief explanation, using null "
+    "for any criterion this excerpt gives no evidence for, and give up to 3 coaching observations."
+)
+
+# Chunk findings use the structured analysis shape, but a chunk may not show every criterion
+CHUNK_ANALYSIS_SCHEMA = copy.deepcopy(STRUCTURED_ANALYSIS_SCHEMA)
+for criterion_schema in CHUNK_ANALYSIS_SCHEMA["properties"]["scores"]["properties"].values():
+    criterion_schema["properties"]["score"]["type"] = ["integer", "null"]
+
+REDUCE_ANALYSIS_PROMPT = (
+    "Below are findings extracted from consecutive excerpts of one sales call, in call order, as JSON. "
+    "Merge them into an analysis of the whole call and respond with JSON only: the top 3 customer objections, "
+    "every distinct competitor name or product, a score out of 10 with a brief explanation for the salesperson's "
+    "structure, clarity, confidence, and closing technique across the whole call, and 3 specific coaching tips "
+    "focused on handling objections better, clearer messaging, and effective closing."
+)
 
-st.markdown("""
+
+def init_session_state():
+    """Initialize session state variables"""
+    if 'uploaded_audio' not in st.session_state:
+        st.session_state.uploaded_audio = None
+    
+    if 'audio_url' not in st.session_state:
+        st.session_state.audio_url = ""
+    
+    if 'transcript' not in st.session_state:
+        st.session_state.transcript = ""
+    
+    if 'segments' not in st.session_state:
+        st.session_state.segments = []
+    
+    if 'call_stages' not in st.session_state:
+        st.session_state.call_stages = {}
+    
+    if 'objections' not in st.session_state:
+        st.session_state.objections = ""
+    
+    if 'competitor_mentions' not in st.session_state:
+        st.session_state.competitor_mentions = ""
+    
+    if 'rep_scores' not in st.session_state:
+        st.session_state.rep_scores = {}
+    
+    if 'coaching_tips' not in st.session_state:
+        st.session_state.coaching_tips = ""
+    
+    if 'segment_store' not in st.session_state:
+        st.session_state.segment_store = None
+    
+    # The segments list the store was built from; a different list means a different call
+    if 'segment_store_segments' not in st.session_state:
+        st.session_state.segment_store_segments = None
+    
+    if 'lexicon_scan' not in st.session_state:
+        st.session_state.lexicon_scan = None
+    
+    if 'analysis_cache_status' not in st.session_state:
+        st.session_state.analysis_cache_status = {}
+    
+    if 'analysis_mode' not in st.session_state:
+        st.session_state.analysis_mode = ANALYSIS_MODE if ANALYSIS_MODE in ANALYSIS_MODES else "structured"
+    
+    if 'stream_analysis' not in st.session_state:
+        st.session_state.stream_analysis = STREAM_ANALYSIS
+    
+    if 'remove_silence' not in st.session_state:
+        st.session_state.remove_silence = SILENCE_TRIM_ENABLED
+    
+    if 'upload_stats' not in st.session_state:
+        # Audio preprocessing savings for the call that was just transcribed
+        st.session_state.upload_stats = {}
+    
+    if 'call_trace' not in st.session_state:
+        # Spans recorded while the current call was processed
+        st.session_state.call_trace = None
+    
+    if 'render_traces' not in st.session_state:
+        # Spans from the latest render of each results tab, keyed by tab function
+        st.session_state.render_traces = {}
+    
+    if 'job_id' not in st.session_state:
+        # Restore the job from the URL so a page refresh picks up where it left off
+        st.session_state.job_id = st.query_params.get("job")
+    
+    if 'loaded_job_id' not in st.session_state:
+        st.session_state.loaded_job_id = None
+    
+    if 'call_id' not in st.session_state:
+        # Reopen a saved call linked from the URL
+        st.session_state.call_id = st.query_params.get("call")
+    
+    if 'loaded_call_id' not in st.session_state:
+        st.session_state.loaded_call_id = None
+    
+    if 'transcript_jump' not in st.session_state:
+        # Seconds into the call the transcript table should scroll to on its next render
+        st.session_state.transcript_jump = None
+    
+    if 'rep_name' not in st.session_state:
+        st.session_state.rep_name = ""
+    
+    if 'call_date' not in st.session_state:
+        st.session_state.call_date = datetime.now().date()
+    
+    if 'analysis_runs' not in st.session_state:
+        st.session_state.analysis_runs = []
+    
+    if 'processing' not in st.session_state:
+        st.session_state.processing = False
+    
+    if 'api_key' not in st.session_state:
+        st.session_state.api_key = ""
+    
+    if 'session_id' not in st.session_state:
+        # Identifies this browser session for per-user job limits when there is no login
+        st.session_state.session_id = uuid.uuid4().hex
+
+def inject_styles():
+    """Inject the app's custom CSS"""
+    st.markdown("""
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -134,153 +415,541 @@ st.markdown("""
         width: 100%;
     }
 </style>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
+
+
+@st.cache_resource
+def get_mistral_client():
+    """Return the Mistral API client shared by every session in this process"""
+    return MistralClient(
+        MISTRAL_API_BASE, rate_limit=RATE_LIMIT, max_retries=MAX_RETRIES, hedge_quantile=HEDGE_QUANTILE or None,
+        breaker_threshold=BREAKER_THRESHOLD, breaker_cooldown=BREAKER_COOLDOWN
+    )
+
+@st.cache_resource
+def get_transcription_cache():
+    """Return the process-wide transcription cache"""
+    return TranscriptionCache(TRANSCRIPTION_CACHE_DIR, max_bytes=TRANSCRIPTION_CACHE_MAX_BYTES)
+
+@st.cache_resource
+def get_response_cache():
+    """Return the process-wide chat response cache, or None when disabled"""
+    if RESPONSE_CACHE_BACKEND == "sqlite":
+        return SQLiteResponseCache(RESPONSE_CACHE_PATH, ttl=RESPONSE_CACHE_TTL, max_bytes=RESPONSE_CACHE_MAX_BYTES)
+    if RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryResponseCache(ttl=RESPONSE_CACHE_TTL, max_bytes=RESPONSE_CACHE_MAX_BYTES)
+    return None
+
+@st.cache_resource
+def get_trace_exporter():
+    """Return the exporter that finished traces are sent to, shared by every session"""
+    return TraceExporter(trace_file=TRACE_FILE, otlp_endpoint=OTLP_ENDPOINT, metrics_path=METRICS_PATH)
 
+@st.cache_resource
+def get_call_store():
+    """Return the process-wide store of analyzed calls"""
+    return CallStore(CALL_DB_PATH)
 
+@st.cache_resource
+def get_lexicon_matcher():
+    """Return the compiled keyword and filler-word matcher"""
+    return LexiconMatcher(load_lexicons(LEXICONS_PATH))
 
-def transcribe_audio(audio_url=None, audio_file=None):
+def get_api_key():
+    """Get API key from session state or use default"""
+    return st.session_state.api_key if st.session_state.api_key else DEFAULT_MISTRAL_API_KEY
+
+
+@tracing.traced()
+def transcribe_audio(audio_url=None, audio_file=None, api_key=None, use_cache=True, long_audio=None, progress=None, remove_silence=None, compress=None):
     """Transcribe audio using Mistral API with timestamps"""
     try:
+        if remove_silence is None:
+            remove_silence = SILENCE_TRIM_ENABLED
+        remove_silence = remove_silence and audio_file is not None and not audio_url
+        if compress is None:
+            compress = COMPRESS_URLS if audio_url else COMPRESS_UPLOADS
+        
+        cache = get_transcription_cache() if use_cache else None
+        cache_key = None
+        if cache:
+            preprocessing = []
+            if remove_silence:
+                preprocessing.append(f"trim:{SILENCE_THRESHOLD_DB}:{SILENCE_MIN_SECONDS}")
+            if compress:
+                preprocessing.append(f"compress:{COMPRESS_SAMPLE_RATE}:{COMPRESS_BITRATE}")
+            cache_key = TranscriptionCache.make_key(
+                TRANSCRIPTION_MODEL, TIMESTAMP_GRANULARITIES,
+                audio_file=audio_file if not audio_url else None, audio_url=audio_url,
+                preprocessing="|".join(preprocessing)
+            )
+            if cache_key:
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    return cached, None
+        
         # Get API key from session state or use default
-        api_key = st.session_state.api_key if st.session_state.api_key else DEFAULT_MISTRAL_API_KEY
+        if api_key is None:
+            api_key = get_api_key()
         
         if not api_key:
             return None, "API key is required. Please provide a Mistral API key in the API Configuration section."
         
-        url = "https://api.mistral.ai/v1/audio/transcriptions"
+        if long_audio is None:
+            long_audio = LONG_AUDIO_ENABLED
+        
+        preprocessed = None
+        if audio_url and compress:
+            try:
+                with downloaded_audio(audio_url, chunk_size=UPLOAD_CHUNK_SIZE, max_seconds=COMPRESS_DOWNLOAD_SECONDS) as downloaded:
+                    preprocessed = transcribe_audio(audio_file=downloaded, api_key=api_key, use_cache=False, long_audio=long_audio, progress=progress, compress=True)
+            except (requests.RequestException, OSError):
+                # Compression is only an optimization: let the API fetch the URL itself
+                preprocessed = None
+        if preprocessed is None and remove_silence:
+            preprocessed = transcribe_without_silence(audio_file, api_key, long_audio=long_audio, progress=progress)
+        if preprocessed is None and audio_file and not audio_url and compress:
+            preprocessed = transcribe_compressed(audio_file, api_key, long_audio=long_audio, progress=progress)
+        
+        if preprocessed is not None:
+            result, error = preprocessed
+            if result is not None and cache_key:
+                cache.put(cache_key, result)
+            return result, error
+        
+        if audio_file and not audio_url and long_audio:
+            chunked = transcribe_long_audio(audio_file, api_key)
+            if chunked is not None:
+                result, error = chunked
+                if result is not None and cache_key:
+                    cache.put(cache_key, result)
+                return result, error
+        
         headers = {"x-api-key": api_key}
         
         if audio_url:
             data = {
                 'file_url': audio_url,
-                'model': "voxtral-mini-2507",
-                'timestamp_granularities': "segment"
+                'model': TRANSCRIPTION_MODEL,
+                'timestamp_granularities': TIMESTAMP_GRANULARITIES
             }
-            response = requests.post(url, headers=headers, data=data)
+            response = get_mistral_client().post("audio/transcriptions", headers=headers, data=data)
         elif audio_file:
-            files = {
-                'file': audio_file,
-                'model': (None, "voxtral-mini-2507"),
-                'timestamp_granularities': (None, "segment")
-            }
-            response = requests.post(url, headers=headers, files=files)
+            with spooled_upload(audio_file, chunk_size=UPLOAD_CHUNK_SIZE) as spooled:
+                body = MultipartStream(
+                    fields={
+                        'model': TRANSCRIPTION_MODEL,
+                        'timestamp_granularities': TIMESTAMP_GRANULARITIES
+                    },
+                    file_field='file',
+                    file=spooled,
+                    filename=os.path.basename(getattr(audio_file, "name", "") or "audio.mp3"),
+                    chunk_size=UPLOAD_CHUNK_SIZE,
+                    progress=progress
+                )
+                headers["Content-Type"] = body.content_type
+                response = get_mistral_client().post("audio/transcriptions", headers=headers, data=body)
         else:
             return None, "No audio provided"
         
         if response.status_code == 200:
             result = response.json()
+            if cache_key:
+                cache.put(cache_key, result)
             return result, None
         else:
             return None, f"API Error: {response.status_code} - {response.text}"
     except Exception as e:
         return None, f"Exception: {str(e)}"
 
-def chat_with_audio(audio_url=None, audio_file=None, prompt=""):
-    """Chat with audio using Mistral API"""
+@tracing.traced()
+def transcribe_without_silence(audio_file, api_key, long_audio=None, progress=None):
+    """Upload the audio with long silences cut out and map segments back; returns None if not worth it"""
     try:
-        api_key = st.session_state.api_key if st.session_state.api_key else DEFAULT_MISTRAL_API_KEY
+        audio = load_audio(audio_file)
+    except Exception:
+        # Can't decode locally (no pydub/ffmpeg or unusual codec): upload the original
+        return None
+    
+    trimmed, offset_map = trim_silence(audio, SILENCE_THRESHOLD_DB, SILENCE_MIN_SECONDS, SILENCE_PADDING_SECONDS)
+    original_seconds = len(audio) / 1000.0
+    uploaded_seconds = len(trimmed) / 1000.0
+    del audio
+    if original_seconds - uploaded_seconds < SILENCE_MIN_SAVED_SECONDS:
+        return None
+    
+    export_format = "wav" if getattr(audio_file, "name", "").lower().endswith(".wav") else "mp3"
+    buffer = io.BytesIO()
+    trimmed.export(buffer, format=export_format)
+    del trimmed
+    buffer.seek(0)
+    buffer.name = f"trimmed.{export_format}"
+    
+    result, error = transcribe_audio(audio_file=buffer, api_key=api_key, use_cache=False, long_audio=long_audio, progress=progress, remove_silence=False)
+    if error:
+        return None, error
+    
+    audio_file.seek(0, os.SEEK_END)
+    result = dict(result)
+    result["segments"] = remap_segments(result.get("segments", []), offset_map)
+    result["silence_trim"] = {
+        "original_seconds": original_seconds,
+        "uploaded_seconds": uploaded_seconds,
+        "original_bytes": audio_file.tell(),
+        "uploaded_bytes": buffer.getbuffer().nbytes
+    }
+    audio_file.seek(0)
+    return result, None
+
+@tracing.traced()
+def transcribe_compressed(audio_file, api_key, long_audio=None, progress=None):
+    """Upload a mono, resampled, re-encoded copy of the audio; returns None if that wouldn't be smaller"""
+    format = compression_format(audio_file)
+    if format is None:
+        return None
+    
+    with tempfile.NamedTemporaryFile(prefix="repradar-compressed-", suffix=f".{format}") as compressed:
+        started = time.perf_counter()
+        try:
+            compress_audio(audio_file, compressed, sample_rate=COMPRESS_SAMPLE_RATE, bitrate=COMPRESS_BITRATE, chunk_size=UPLOAD_CHUNK_SIZE)
+        except Exception:
+            # Unreadable or unusual input: upload the original instead
+            return None
+        encode_seconds = time.perf_counter() - started
+        
+        compressed.flush()
+        compressed_bytes = compressed.seek(0, os.SEEK_END)
+        audio_file.seek(0, os.SEEK_END)
+        original_bytes = audio_file.tell()
+        audio_file.seek(0)
+        if compressed_bytes > original_bytes * COMPRESS_MAX_RATIO:
+            return None
+        compressed.seek(0)
+        
+        # Time the body upload to estimate how long the original would have taken
+        upload_times = []
+        
+        def timed_progress(sent, total):
+            upload_times.append(time.perf_counter())
+            if progress:
+                progress(sent, total)
+        
+        result, error = transcribe_audio(audio_file=compressed, api_key=api_key, use_cache=False, long_audio=long_audio, progress=timed_progress, remove_silence=False, compress=False)
+        if error:
+            return None, error
+    
+    upload_seconds = upload_times[-1] - upload_times[0] if len(upload_times) > 1 else 0.0
+    result = dict(result)
+    result["compression"] = {
+        "format": format,
+        "sample_rate": COMPRESS_SAMPLE_RATE,
+        "original_bytes": original_bytes,
+        "uploaded_bytes": compressed_bytes,
+        "ratio": original_bytes / max(1, compressed_bytes),
+        "encode_seconds": encode_seconds,
+        "upload_seconds": upload_seconds,
+        "seconds_saved": upload_seconds * (original_bytes / max(1, compressed_bytes) - 1) - encode_seconds
+    }
+    return result, None
+
+@tracing.traced()
+def transcribe_chunk(path, start, seconds, format, api_key):
+    """Cut one long-audio window to a temp file and transcribe it, retrying just this chunk on failure"""
+    with tempfile.NamedTemporaryFile(prefix="repradar-chunk-", suffix=f".{format}") as chunk:
+        export_audio_window(path, chunk, start, seconds, format, chunk_size=UPLOAD_CHUNK_SIZE)
+        error = None
+        for attempt in range(LONG_AUDIO_CHUNK_RETRIES + 1):
+            if attempt:
+                time.sleep(2 ** attempt)
+            chunk.seek(0)
+            # Chunk entries would never be looked up again; the whole recording is cached instead
+            result, error = transcribe_audio(audio_file=chunk, api_key=api_key, use_cache=False, long_audio=False, remove_silence=False, compress=False)
+            if not error:
+                return result, None
+    return None, error
+
+@tracing.traced()
+def transcribe_long_audio(audio_file, api_key):
+    """Transcribe a long upload as overlapping chunks in parallel; returns None if it fits in one request"""
+    audio_file.seek(0, os.SEEK_END)
+    size = audio_file.tell()
+    audio_file.seek(0)
+    if size < LONG_AUDIO_MIN_BYTES:
+        return None
+    
+    with spooled_upload(audio_file, chunk_size=UPLOAD_CHUNK_SIZE) as spooled:
+        path = getattr(spooled, "name", None)
+        # Windows are cut with ffmpeg, or from WAV frames without it, so nothing is decoded up front
+        format = compression_format(spooled)
+        if format is None or not isinstance(path, str) or not os.path.isfile(path):
+            return None
+        duration = audio_duration(path)
+        if duration is None or duration <= LONG_AUDIO_CHUNK_SECONDS:
+            return None
+        
+        windows = audio_windows(duration, chunk_seconds=LONG_AUDIO_CHUNK_SECONDS, overlap_seconds=LONG_AUDIO_OVERLAP_SECONDS)
+        # Each task cuts its own window when it starts, so at most one chunk per worker is on disk
+        with ThreadPoolExecutor(max_workers=min(LONG_AUDIO_MAX_WORKERS, len(windows))) as executor:
+            futures = [
+                executor.submit(tracing.wrap(transcribe_chunk, "chunk", offset=start), path, start, seconds, format, api_key)
+                for start, seconds in windows
+            ]
+            try:
+                chunk_results = [future.result() for future in futures]
+            except Exception:
+                # A window couldn't be cut locally: fall back to a single upload
+                for future in futures:
+                    future.cancel()
+                return None
+    
+    for index, (_, error) in enumerate(chunk_results):
+        if error:
+            return None, f"Chunk {index + 1} of {len(windows)} failed: {error}"
+    
+    segments = stitch_segments(
+        [(start, result.get("segments", [])) for (start, _), (result, _) in zip(windows, chunk_results)],
+        overlap_seconds=LONG_AUDIO_OVERLAP_SECONDS
+    )
+    
+    return {
+        "model": TRANSCRIPTION_MODEL,
+        "text": " ".join(segment.get("text", "").strip() for segment in segments),
+        "segments": segments,
+        "chunks": len(windows)
+    }, None
+
+def build_chat_payload(prompt, audio_url=None, response_format=None):
+    """Build the chat completion request body for a prompt and optional audio URL"""
+    # Prepare the message content
+    message_content = []
+    
+    # Add audio content
+    if audio_url:
+        message_content.append({
+            "type": "input_audio",
+            "input_audio": {
+                "data": audio_url,
+                "format": "mp3"  
+            }
+        })
+    
+    message_content.append({
+        "type": "text",
+        "text": prompt
+    })
+    
+    data = {
+        "model": "voxtral-mini-2507",
+        "messages": [
+            {
+                "role": "user",
+                "content": message_content
+            }
+        ]
+    }
+    
+    if response_format:
+        data["response_format"] = response_format
+    
+    return data
+
+def trace_usage(usage):
+    """Record a chat response's token counts on the current span"""
+    tracing.set_attributes(**{
+        "gen_ai.usage.input_tokens": usage.get("prompt_tokens"),
+        "gen_ai.usage.output_tokens": usage.get("completion_tokens")
+    })
+
+@tracing.traced()
+def chat_completion(data, api_key=None, timeout=None, use_cache=True, deadline=None, parse=None):
+    """Send a chat completion request, serving repeats from the response cache; returns (content, error, meta)"""
+    # With parse, content is parse(reply) and a reply it rejects (ValueError, TypeError or
+    # AttributeError) is an error; only replies that parse are cached, so a malformed one isn't replayed
+    meta = {"cached": False, "usage": {}}
+    try:
+        cache = get_response_cache() if use_cache else None
+        cache_key = make_response_key(data) if cache else None
+        if cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                try:
+                    content = parse(cached) if parse else cached
+                except (ValueError, TypeError, AttributeError):
+                    # Cached before replies were validated: ask again
+                    pass
+                else:
+                    meta["cached"] = True
+                    tracing.set_attributes(**{"cache.hit": True})
+                    return content, None, meta
+        
+        if api_key is None:
+            api_key = get_api_key()
         
         if not api_key:
-            return None, "API key is required. Please provide a Mistral API key in the API Configuration section."
+            return None, "API key is required. Please provide a Mistral API key in the API Configuration section.", meta
             
-        url = "https://api.mistral.ai/v1/chat/completions"
         headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
         
-        # Prepare the message content
-        message_content = []
+        response = get_mistral_client().post("chat/completions", headers=headers, json=data, timeout=timeout, deadline=deadline)
         
-        # Add audio content
-        if audio_url:
-            message_content.append({
-                "type": "input_audio",
-                "input_audio": {
-                    "data": audio_url,
-                    "format": "mp3"  
-                }
-            })
+        if response.status_code == 200:
+            result = response.json()
+            reply = result["choices"][0]["message"]["content"]
+            meta["usage"] = result.get("usage") or {}
+            trace_usage(meta["usage"])
+            try:
+                content = parse(reply) if parse else reply
+            except (ValueError, TypeError, AttributeError) as e:
+                return None, f"Invalid response: {str(e)}", meta
+            if cache:
+                cache.put(cache_key, reply)
+            return content, None, meta
+        else:
+            return None, f"API Error: {response.status_code} - {response.text}", meta
+    except Exception as e:
+        return None, f"Exception: {str(e)}", meta
+
+@tracing.traced()
+def stream_chat_completion(data, api_key=None, timeout=None, on_delta=None, use_cache=True, deadline=None):
+    """Stream a chat completion over server-sent events, calling on_delta with each text fragment; returns (content, error, meta)"""
+    # If the deadline passes mid-stream the text so far is returned and meta["truncated"] is set
+    meta = {"cached": False, "usage": {}, "truncated": False}
+    try:
+        # Share cache entries with non-streaming requests for the same payload
+        cache = get_response_cache() if use_cache else None
+        cache_key = make_response_key(data) if cache else None
+        if cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                meta["cached"] = True
+                tracing.set_attributes(**{"cache.hit": True})
+                if on_delta:
+                    on_delta(cached)
+                return cached, None, meta
         
+        if api_key is None:
+            api_key = get_api_key()
         
-        message_content.append({
-            "type": "text",
-            "text": prompt
-        })
+        if not api_key:
+            return None, "API key is required. Please provide a Mistral API key in the API Configuration section.", meta
         
-        data = {
-            "model": "voxtral-mini-2507",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": message_content
-                }
-            ]
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
         }
         
-        response = requests.post(url, headers=headers, json=data)
+        response = get_mistral_client().post("chat/completions", headers=headers, json=dict(data, stream=True), timeout=timeout, stream=True, deadline=deadline)
         
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"], None
-        else:
-            return None, f"API Error: {response.status_code} - {response.text}"
+        if response.status_code != 200:
+            return None, f"API Error: {response.status_code} - {response.text}", meta
+        
+        parts = []
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                if deadline is not None and time.monotonic() > deadline:
+                    meta["truncated"] = True
+                    break
+                chunk = json.loads(payload)
+                if chunk.get("usage"):
+                    meta["usage"] = chunk["usage"]
+                for choice in chunk.get("choices", []):
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        parts.append(delta)
+                        if on_delta:
+                            on_delta(delta)
+        
+        content = "".join(parts)
+        trace_usage(meta["usage"])
+        if cache and not meta["truncated"]:
+            cache.put(cache_key, content)
+        return content, None, meta
     except Exception as e:
-        return None, f"Exception: {str(e)}"
+        return None, f"Exception: {str(e)}", meta
+
+def chat_with_audio(audio_url=None, audio_file=None, prompt="", api_key=None, timeout=None):
+    """Chat with audio using Mistral API"""
+    content, error, _ = chat_completion(build_chat_payload(prompt, audio_url=audio_url), api_key=api_key, timeout=timeout)
+    return content, error
+
+def call_stage_bounds(total_segments):
+    """Return the segment positions where each call stage ends"""
+    intro_end = max(1, int(total_segments * 0.15))
+    discovery_end = max(2, int(total_segments * 0.4))
+    demo_end = max(3, int(total_segments * 0.65))
+    objections_end = max(4, int(total_segments * 0.85))
+    return [intro_end, discovery_end, demo_end, objections_end, total_segments]
 
+def call_stage_index(total_segments):
+    """Return an int8 array giving the CALL_STAGES position of every segment"""
+    ends = np.minimum(call_stage_bounds(total_segments), total_segments)
+    lengths = np.diff(np.concatenate(([0], ends))).clip(min=0)
+    return np.repeat(np.arange(len(CALL_STAGES), dtype=np.int8), lengths)
+
+@tracing.traced()
 def segment_call(segments):
     """Segment the call into different stages based on transcript segments"""
-    call_stages = {
-        "intro": [],
-        "discovery": [],
-        "demo": [],
-        "objections": [],
-        "closing": []
-    }
+    call_stages = {stage: [] for stage in CALL_STAGES}
     
     total_segments = len(segments)
     
     if total_segments > 0:
-        intro_end = max(1, int(total_segments * 0.15))
-        discovery_end = max(2, int(total_segments * 0.4))
-        demo_end = max(3, int(total_segments * 0.65))
-        objections_end = max(4, int(total_segments * 0.85))
-        
-        call_stages["intro"] = segments[:intro_end]
-        call_stages["discovery"] = segments[intro_end:discovery_end]
-        call_stages["demo"] = segments[discovery_end:demo_end]
-        call_stages["objections"] = segments[demo_end:objections_end]
-        call_stages["closing"] = segments[objections_end:]
+        start = 0
+        for stage, end in zip(CALL_STAGES, call_stage_bounds(total_segments)):
+            call_stages[stage] = segments[start:end]
+            start = max(start, end)
     
     return call_stages
 
+@tracing.traced()
+def build_segment_store(segments):
+    """Build the columnar segment store for a call, including each segment's stage"""
+    return SegmentStore.from_segments(segments, call_stage_index(len(segments)))
+
+def get_segment_store():
+    """Return the current call's segment store, building it only if the call changed"""
+    store = st.session_state.segment_store
+    if store is None or st.session_state.segment_store_segments is not st.session_state.segments:
+        store = build_segment_store(st.session_state.segments)
+        st.session_state.segment_store = store
+        st.session_state.segment_store_segments = st.session_state.segments
+    return store
+
+def get_lexicon_scan():
+    """Return keyword matches for every segment of the current call, scanning once per call"""
+    store = get_segment_store()
+    cached = st.session_state.lexicon_scan
+    if cached is None or cached[0] is not store:
+        cached = (store, get_lexicon_matcher().scan(store.texts()))
+        st.session_state.lexicon_scan = cached
+    return cached[1]
+
 def calculate_talk_ratio(segments):
     """Calculate talk-to-listen ratio from transcript segments"""
-    rep_duration = 0
-    customer_duration = 0
-    
-    for i, segment in enumerate(segments):
-        duration = segment.get("end", 0) - segment.get("start", 0)
-        if i % 2 == 0:
-            rep_duration += duration
-        else:
-            customer_duration += duration
-    
-    if customer_duration == 0:
-        customer_duration = 1 
-    
-    return rep_duration / customer_duration
+    return SegmentStore.from_segments(segments).talk_ratio()
 
-def extract_call_metrics(transcript, segments):
+@tracing.traced()
+def extract_call_metrics(transcript, segments, store=None):
     """Extract basic metrics from the call transcript"""
+    if store is None:
+        store = SegmentStore.from_segments(segments)
+    
     word_count = len(transcript.split())
     
-    duration = segments[-1]["end"] if segments else 0
+    duration = store.call_duration
     
-    talk_ratio = calculate_talk_ratio(segments)
+    talk_ratio = store.talk_ratio()
     
-    filler_words = ["um", "uh", "like", "you know", "actually", "basically"]
-    filler_count = sum(transcript.lower().count(word) for word in filler_words)
+    filler_count = get_lexicon_matcher().count(transcript).get("fillers", 0)
     
     metrics = {
         "word_count": word_count,
@@ -292,27 +961,150 @@ def extract_call_metrics(transcript, segments):
     
     return metrics
 
-def analyze_call(transcript, segments):
-    """Generate comprehensive call analysis using Chat with Audio API"""
-    objections_prompt = "Analyze this sales call transcript and list the top 3 customer objections. Format as bullet points."
-    competitor_prompt = "Identify any competitor names or products mentioned in this call. Format as a bulleted list."
-    rep_scoring_prompt = "Evaluate the salesperson on structure, clarity, confidence, and closing technique. Give a score out of 10 for each criterion and brief explanation."
-    coaching_prompt = "Provide 3 specific coaching tips to improve this sales call. Focus on handling objections better, clearer messaging, and effective closing."
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES)
+def get_call_metrics(digest, _transcript, _store):
+    """Return extract_call_metrics for a call, computed once per call content"""
+    return extract_call_metrics(_transcript, None, store=_store)
+
+# Figures are cached as shared objects and never modified after they are built
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+@tracing.traced()
+def build_timeline_figure(digest, _store, window=None):
+    """Build the speaker/stage timeline for a call, or for the window=(start, end) part of it"""
+    spans = _store.timeline_spans(TIMELINE_MAX_SPANS, window)
+    
+    fig = go.Figure()
+    for code, stage in enumerate(CALL_STAGES):
+        rows = np.flatnonzero(spans["stage"] == code)
+        if not len(rows):
+            continue
+        start, end = spans["start"][rows], spans["end"][rows]
+        
+        # Each span is a thick line from start to end; the NaN after it breaks the line
+        x = np.column_stack((start, end, np.full(len(rows), np.nan))).ravel()
+        y = np.repeat(spans["speaker"][rows].astype(np.float64), 3)
+        labels = [
+            f"{_store.text(first)[:50]}..." if count == 1 and len(_store.text(first)) > 50
+            else _store.text(first) if count == 1
+            else f"{count} segments"
+            for first, count in zip(spans["first"][rows], spans["count"][rows])
+        ]
+        fig.add_trace(go.Scattergl(
+            x=x,
+            y=y,
+            mode="lines",
+            name=stage.capitalize(),
+            line=dict(color=STAGE_COLORS[stage], width=24),
+            hovertext=[text for label in labels for text in (label, label, None)],
+            hovertemplate="%{hovertext}<extra>" + stage.capitalize() + "</extra>",
+            connectgaps=False
+        ))
+    
+    fig.update_layout(
+        title="Call Timeline by Speaker and Stage",
+        xaxis_title="Time (seconds)",
+        yaxis_title="Speaker",
+        yaxis=dict(tickvals=list(range(len(SPEAKERS))), ticktext=list(SPEAKERS), range=[len(SPEAKERS) - 0.5, -0.5]),
+        height=300,
+        margin=dict(l=10, r=10, t=50, b=30)
+    )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+@tracing.traced()
+def build_highlights_html(digest, _store, _scan):
+    """Build the keyword highlight list for a call"""
+    return "<br>".join(
+        f"• {_scan.highlight(i, _store.text(i), lexicons=HIGHLIGHT_LEXICONS)}"
+        for i in _scan.texts_matching(HIGHLIGHT_LEXICONS)
+    )
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+@tracing.traced()
+def build_radar_figure(scores):
+    """Build the rep score radar chart from (criterion, score) pairs"""
+    categories = [criterion for criterion, _ in scores]
+    values = [score for _, score in scores]
     
-    text_transcript = transcript
+    # Add the first value at the end to close the loop
+    categories.append(categories[0])
+    values.append(values[0])
     
-    objections_response, error = chat_with_audio(prompt=objections_prompt + "\n\n" + text_transcript)
-    objections = objections_response if not error else "Error analyzing objections"
+    fig = go.Figure()
     
-    competitor_response, error = chat_with_audio(prompt=competitor_prompt + "\n\n" + text_transcript)
-    competitors = competitor_response if not error else "Error analyzing competitor mentions"
+    fig.add_trace(go.Scatterpolar(
+        r=values,
+        theta=categories,
+        fill='toself',
+        name='Rep Performance',
+        line_color='#3B82F6',
+        fillcolor='rgba(59, 130, 246, 0.3)'
+    ))
     
-    scoring_response, error = chat_with_audio(prompt=rep_scoring_prompt + "\n\n" + text_transcript)
-    scoring = scoring_response if not error else "Error analyzing rep performance"
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 10]
+            )
+        ),
+        showlegend=False,
+        height=400
+    )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES)
+@tracing.traced()
+def build_talk_time_figure(rep_time, customer_time):
+    """Build the rep/customer talk time donut chart"""
+    total_time = rep_time + customer_time
     
-    coaching_response, error = chat_with_audio(prompt=coaching_prompt + "\n\n" + text_transcript)
-    coaching = coaching_response if not error else "Error generating coaching tips"
+    fig = go.Figure(data=[go.Pie(
+        labels=['Rep', 'Customer'],
+        values=[rep_time, customer_time],
+        hole=.4,
+        marker_colors=['#3B82F6', '#10B981']
+    )])
     
+    fig.update_layout(
+        title="Talk Time Distribution",
+        annotations=[dict(text=f'{rep_time / (total_time or 1):.0%}<br>Rep', x=0.5, y=0.5, font_size=15, showarrow=False)],
+        height=300
+    )
+    return fig
+
+def run_analysis_prompts(transcript, prompts=None, api_key=None, max_workers=None, timeout=None, on_delta=None, on_result=None, deadline=None):
+    """Send analysis prompts to the chat endpoint in parallel and return {name: (response, error, meta)}"""
+    # With on_delta the replies are streamed and on_delta(name, fragment) is called as text arrives;
+    # on_result(name, response, error) is called as soon as each prompt finishes
+    prompts = ANALYSIS_PROMPTS if prompts is None else prompts
+    max_workers = max_workers or ANALYSIS_MAX_WORKERS
+    timeout = timeout or ANALYSIS_TIMEOUT
+    
+    # Resolve the key here: worker threads have no access to st.session_state
+    if api_key is None:
+        api_key = get_api_key()
+    
+    if not prompts:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as executor:
+        futures = {}
+        for name, prompt in prompts.items():
+            data = build_chat_payload(prompt + "\n\n" + transcript)
+            if on_delta:
+                futures[name] = executor.submit(tracing.wrap(stream_chat_completion, f"prompt:{name}"), data, api_key=api_key, timeout=timeout, deadline=deadline,
+                                                on_delta=lambda delta, name=name: on_delta(name, delta))
+            else:
+                futures[name] = executor.submit(tracing.wrap(chat_completion, f"prompt:{name}"), data, api_key=api_key, timeout=timeout, deadline=deadline)
+            if on_result:
+                futures[name].add_done_callback(lambda future, name=name: on_result(name, *future.result()[:2]))
+        return {name: future.result() for name, future in futures.items()}
+
+@tracing.traced()
+def parse_rep_scores(scoring):
+    """Parse per-criterion scores out of the free-text scoring response"""
     scores = {}
     try:
         if "structure:" in scoring.lower():
@@ -335,14 +1127,649 @@ def analyze_call(transcript, segments):
             "closing": 5
         }
     
+    return scores
+
+def add_usage(total, usage):
+    """Accumulate token counts from an API usage block"""
+    for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        total[field] = total.get(field, 0) + (usage.get(field) or 0)
+    return total
+
+def format_bullets(items, numbered=False):
+    """Format a list of strings as a Markdown list"""
+    return "\n".join(f"{i}. {item}" if numbered else f"- {item}" for i, item in enumerate(items, start=1))
+
+@tracing.traced()
+def parse_structured_analysis(content):
+    """Validate a structured analysis response and convert it to the analyze_call result shape"""
+    return structured_analysis_result(json.loads(content))
+
+def structured_analysis_result(data):
+    """Validate structured analysis data and convert it to the analyze_call result shape"""
+    if not isinstance(data, dict):
+        raise ValueError("Structured analysis is not a JSON object")
+    
+    for field in ("objections", "competitors", "coaching_tips"):
+        if not isinstance(data.get(field), list) or not all(isinstance(item, str) for item in data[field]):
+            raise ValueError(f"Structured analysis field '{field}' is not a list of strings")
+    
+    scores = {}
+    explanations = []
+    for criterion in SCORE_CRITERIA:
+        entry = (data.get("scores") or {}).get(criterion)
+        if not isinstance(entry, dict):
+            raise ValueError(f"Structured analysis is missing a score for '{criterion}'")
+        score = entry.get("score")
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 10:
+            raise ValueError(f"Structured analysis score for '{criterion}' is not between 0 and 10")
+        scores[criterion] = int(round(score))
+        explanations.append(f"{criterion.capitalize()}: {scores[criterion]}/10 - {entry.get('explanation', '')}")
+    
     return {
-        "objections": objections,
-        "competitors": competitors,
-        "scoring": scoring,
+        "objections": format_bullets(data["objections"]),
+        "competitors": format_bullets(data["competitors"]) if data["competitors"] else "No competitor mentions detected.",
+        # The call store indexes these, never the bulleted text above
+        "competitor_names": [name.strip() for name in data["competitors"] if name.strip()],
+        "scoring": "\n".join(explanations),
         "scores": scores,
-        "coaching": coaching
+        "coaching": format_bullets(data["coaching_tips"], numbered=True)
+    }
+
+@tracing.traced()
+def analyze_call_structured(transcript, api_key=None, timeout=None, deadline=None):
+    """Request objections, competitors, scores and coaching tips in one JSON-schema response"""
+    data = build_chat_payload(
+        STRUCTURED_ANALYSIS_PROMPT + "\n\n" + transcript,
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "call_analysis", "schema": STRUCTURED_ANALYSIS_SCHEMA, "strict": True}
+        }
+    )
+    results, error, meta = chat_completion(data, api_key=api_key, timeout=timeout or ANALYSIS_TIMEOUT, deadline=deadline, parse=parse_structured_analysis)
+    
+    stats = {"mode": "structured", "requests": 1, "usage": add_usage({}, meta["usage"])}
+    if error:
+        return None, stats
+    
+    results["cache_status"] = {name: meta["cached"] for name in ANALYSIS_PROMPTS}
+    return results, stats
+
+@tracing.traced()
+def analyze_call_per_prompt(transcript, prompts=None, api_key=None, max_workers=None, timeout=None, on_delta=None, on_result=None, deadline=None):
+    """Run each analysis prompt as its own request and scrape scores from the free-text reply"""
+    responses = run_analysis_prompts(transcript, prompts=prompts, api_key=api_key, max_workers=max_workers, timeout=timeout, on_delta=on_delta, on_result=on_result, deadline=deadline)
+    
+    results = {"cache_status": {}}
+    stats = {"mode": "per_prompt", "requests": len(responses), "usage": {}}
+    for name, (response, error, meta) in responses.items():
+        if error and deadline is not None and time.monotonic() >= deadline:
+            results[name] = ANALYSIS_DEADLINE_MESSAGE
+            stats["timed_out"] = True
+        elif meta.get("truncated"):
+            results[name] = response + "\n\n_(Cut short: the analysis ran out of time.)_"
+            stats["timed_out"] = True
+        else:
+            results[name] = response if not error else ANALYSIS_ERRORS.get(name, f"Error running {name} analysis")
+        results["cache_status"][name] = meta["cached"]
+        add_usage(stats["usage"], meta["usage"])
+    
+    for name in ANALYSIS_PROMPTS:
+        results.setdefault(name, "")
+    
+    results["scores"] = parse_rep_scores(results["scoring"])
+    results["competitors"], results["competitor_names"] = split_competitor_names(results["competitors"])
+    
+    return results, stats
+
+def split_competitor_names(content):
+    """Split the per-prompt competitors reply into its display text and the names on its COMPETITOR_NAMES line"""
+    # While streaming, the line may be cut off anywhere, so everything from the marker on is hidden
+    position = content.rfind(COMPETITOR_NAMES_MARKER)
+    if position < 0:
+        head, _, last_line = content.rpartition("\n")
+        if last_line.strip() and COMPETITOR_NAMES_MARKER.startswith(last_line.strip()):
+            return head.rstrip(), []
+        return content, []
+    text = content[:position].rstrip()
+    try:
+        names = json.loads(content[position + len(COMPETITOR_NAMES_MARKER):].strip())
+    except ValueError:
+        return text, []
+    if not isinstance(names, list):
+        return text, []
+    return text, [name.strip() for name in names if isinstance(name, str) and name.strip()]
+
+def estimate_tokens(text):
+    """Estimate the token count of text from its length"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def split_text(text, max_tokens):
+    """Split text between words into pieces of at most about max_tokens"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces, words, length = [], [], 0
+    for word in text.split():
+        if words and length + len(word) > max_chars:
+            pieces.append(" ".join(words))
+            words, length = [], 0
+        words.append(word)
+        length += len(word) + 1
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+def chunk_transcript(segments, max_tokens):
+    """Group segments into chunks of at most max_tokens that never span two call stages
+
+    Returns a list of {"stage", "start", "end", "text"}. Chunks break between segments; only a
+    segment that is longer than max_tokens by itself is split between words.
+    """
+    chunks = []
+    for stage, stage_segments in segment_call(segments).items():
+        texts, tokens, start, end = [], 0, None, None
+        for segment in stage_segments:
+            text = (segment.get("text") or "").strip()
+            pieces = [text] if estimate_tokens(text) <= max_tokens else split_text(text, max_tokens)
+            for piece in pieces:
+                piece_tokens = estimate_tokens(piece)
+                if texts and tokens + piece_tokens > max_tokens:
+                    chunks.append({"stage": stage, "start": start, "end": end, "text": " ".join(texts)})
+                    texts, tokens, start = [], 0, None
+                texts.append(piece)
+                tokens += piece_tokens
+                start = segment.get("start", 0) if start is None else start
+                end = segment.get("end", 0)
+        if texts:
+            chunks.append({"stage": stage, "start": start, "end": end, "text": " ".join(texts)})
+    return chunks
+
+def parse_chunk_findings(content):
+    """Validate one chunk's findings; scores the chunk gave no evidence for are None"""
+    data = json.loads(content)
+    if not isinstance(data, dict):
+        raise ValueError("Chunk findings are not a JSON object")
+    
+    findings = {}
+    for field in ("objections", "competitors", "coaching_tips"):
+        items = data.get(field) or []
+        if not isinstance(items, list):
+            raise ValueError(f"Chunk findings field '{field}' is not a list")
+        seen = set()
+        findings[field] = []
+        for item in items:
+            if isinstance(item, str) and item.strip() and item.strip().casefold() not in seen:
+                seen.add(item.strip().casefold())
+                findings[field].append(item.strip())
+    
+    findings["scores"] = {}
+    for criterion in SCORE_CRITERIA:
+        entry = (data.get("scores") or {}).get(criterion)
+        entry = entry if isinstance(entry, dict) else {}
+        score = entry.get("score")
+        valid = not isinstance(score, bool) and isinstance(score, (int, float)) and 0 <= score <= 10
+        findings["scores"][criterion] = {"score": score if valid else None, "explanation": str(entry.get("explanation") or "")}
+    return findings
+
+def most_common(items, limit=None):
+    """Return distinct items (ignoring case) ordered by how many chunks mention them, then by first mention"""
+    counts, first = {}, {}
+    for item in items:
+        key = item.casefold()
+        counts[key] = counts.get(key, 0) + 1
+        first.setdefault(key, item)
+    ranked = sorted(first, key=lambda key: -counts[key])
+    return [first[key] for key in ranked[:limit]]
+
+def merge_chunk_findings(findings, weights):
+    """Merge chunk findings without a model: dedupe the lists and average scores weighted by chunk size"""
+    merged = {
+        "objections": most_common([item for found in findings for item in found["objections"]], limit=3),
+        "competitors": most_common([item for found in findings for item in found["competitors"]]),
+        "coaching_tips": most_common([item for found in findings for item in found["coaching_tips"]], limit=3),
+        "scores": {}
+    }
+    for criterion in SCORE_CRITERIA:
+        scored = [(found["scores"][criterion], weight) for found, weight in zip(findings, weights) if found["scores"][criterion]["score"] is not None]
+        if not scored:
+            merged["scores"][criterion] = {"score": 0, "explanation": "No evidence in the call."}
+            continue
+        total = sum(weight for _, weight in scored)
+        score = sum(entry["score"] * weight for entry, weight in scored) / total
+        # Explain with the largest chunk that scored this criterion
+        explanation = max(scored, key=lambda pair: pair[1])[0]["explanation"]
+        merged["scores"][criterion] = {"score": int(round(score)), "explanation": explanation}
+    return merged
+
+@tracing.traced()
+def analyze_chunk(chunk, index, total, api_key=None, timeout=None, deadline=None):
+    """Extract objections, competitors, scores and coaching observations from one chunk; returns (findings or None, meta)"""
+    header = f"Excerpt {index + 1} of {total} ({chunk['stage']} stage, {format_timestamp(chunk['start'])}-{format_timestamp(chunk['end'])}):"
+    data = build_chat_payload(
+        CHUNK_ANALYSIS_PROMPT + "\n\n" + header + "\n" + chunk["text"],
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "chunk_findings", "schema": CHUNK_ANALYSIS_SCHEMA, "strict": True}
+        }
+    )
+    findings, error, meta = chat_completion(data, api_key=api_key, timeout=timeout or ANALYSIS_TIMEOUT, deadline=deadline, parse=parse_chunk_findings)
+    return (None if error else findings), meta
+
+@tracing.traced()
+def reduce_chunk_findings(findings, merged, api_key=None, timeout=None, deadline=None):
+    """Ask the model to merge chunk findings into the final analysis; returns (results or None, meta)"""
+    # The per-chunk findings give the model the most to work with, but on very long calls they
+    # could exceed the context themselves; the locally merged findings are bounded
+    evidence = json.dumps(findings)
+    if estimate_tokens(evidence) > MAP_REDUCE_MIN_TOKENS:
+        evidence = json.dumps(merged)
+    data = build_chat_payload(
+        REDUCE_ANALYSIS_PROMPT + "\n\n" + evidence,
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "call_analysis", "schema": STRUCTURED_ANALYSIS_SCHEMA, "strict": True}
+        }
+    )
+    results, error, meta = chat_completion(data, api_key=api_key, timeout=timeout or ANALYSIS_TIMEOUT, deadline=deadline, parse=parse_structured_analysis)
+    return (None if error else results), meta
+
+@tracing.traced()
+def analyze_call_map_reduce(transcript, segments, api_key=None, max_workers=None, timeout=None, deadline=None):
+    """Analyze a long call chunk by chunk in parallel and merge the findings; returns (results or None, stats)"""
+    chunks = chunk_transcript(segments or [{"text": transcript}], MAP_REDUCE_CHUNK_TOKENS)
+    max_workers = max_workers or MAP_REDUCE_WORKERS
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        futures = [
+            executor.submit(tracing.wrap(analyze_chunk, f"chunk:{index}", stage=chunk["stage"]), chunk, index, len(chunks), api_key=api_key, timeout=timeout, deadline=deadline)
+            for index, chunk in enumerate(chunks)
+        ]
+        mapped = [future.result() for future in futures]
+    
+    stats = {"mode": "map_reduce", "requests": len(chunks), "chunks": len(chunks), "usage": {}}
+    findings, weights, cached = [], [], []
+    for chunk, (found, meta) in zip(chunks, mapped):
+        add_usage(stats["usage"], meta["usage"])
+        cached.append(meta["cached"])
+        if found is not None:
+            findings.append(found)
+            weights.append(estimate_tokens(chunk["text"]))
+    stats["failed_chunks"] = len(chunks) - len(findings)
+    if stats["failed_chunks"] and deadline is not None and time.monotonic() >= deadline:
+        stats["timed_out"] = True
+    if not findings:
+        return None, stats
+    
+    merged = merge_chunk_findings(findings, weights)
+    results, meta = reduce_chunk_findings(findings, merged, api_key=api_key, timeout=timeout, deadline=deadline)
+    stats["requests"] += 1
+    add_usage(stats["usage"], meta["usage"])
+    if results is None:
+        stats["mode"] = "map_reduce (merged locally)"
+        results = structured_analysis_result(merged)
+    
+    results["cache_status"] = {name: all(cached) and meta["cached"] for name in ANALYSIS_PROMPTS}
+    return results, stats
+
+def uses_map_reduce(transcript, prompts=None):
+    """Whether analyze_call splits this transcript into chunks instead of sending it whole"""
+    return prompts is None and estimate_tokens(transcript) > MAP_REDUCE_MIN_TOKENS
+
+def failed_analysis_result(timed_out):
+    """Per-section error messages for an analysis that produced nothing"""
+    results = {
+        name: ANALYSIS_DEADLINE_MESSAGE if timed_out else ANALYSIS_ERRORS.get(name, f"Error running {name} analysis")
+        for name in ANALYSIS_PROMPTS
+    }
+    results.update(scores={}, competitor_names=[], cache_status=dict.fromkeys(ANALYSIS_PROMPTS, False))
+    return results
+
+@tracing.traced()
+def analyze_call(transcript, segments, prompts=None, max_workers=None, timeout=None, mode=None, api_key=None, on_delta=None, on_result=None, deadline_seconds=None):
+    """Generate comprehensive call analysis using Chat with Audio API"""
+    mode = mode or ANALYSIS_MODE
+    
+    # on_delta only applies to per-prompt requests; structured replies arrive whole
+    started = time.perf_counter()
+    # Every request below shares this deadline, including fallbacks
+    deadline = time.monotonic() + (deadline_seconds or ANALYSIS_DEADLINE)
+    
+    # Resolve the key here: worker threads have no access to st.session_state
+    if api_key is None:
+        api_key = get_api_key()
+    
+    results = None
+    stats = {"mode": mode, "requests": 0, "usage": {}}
+    # Long calls are analyzed in chunks whatever the mode; their sections arrive together, not streamed
+    if uses_map_reduce(transcript, prompts):
+        results, stats = analyze_call_map_reduce(transcript, segments, api_key=api_key, timeout=timeout, deadline=deadline)
+        if mode != "structured" or on_delta:
+            stats["mode"] += f" (long call; {mode}{' streaming' if on_delta else ''} not used)"
+        # The transcript is too long for the per-prompt requests, so a failed map-reduce is final
+        if results is None:
+            results = failed_analysis_result(time.monotonic() >= deadline)
+    elif mode == "structured" and prompts is None:
+        results, stats = analyze_call_structured(transcript, api_key=api_key, timeout=timeout, deadline=deadline)
+        if results is None and time.monotonic() >= deadline:
+            stats["timed_out"] = True
+            results = failed_analysis_result(True)
+    
+    if results is None:
+        fallback_stats = stats
+        results, stats = analyze_call_per_prompt(transcript, prompts=prompts, api_key=api_key, max_workers=max_workers, timeout=timeout, on_delta=on_delta, on_result=on_result, deadline=deadline)
+        if fallback_stats["requests"]:
+            stats["mode"] = f"{fallback_stats['mode']} (fell back to per_prompt)"
+            stats["requests"] += fallback_stats["requests"]
+            add_usage(stats["usage"], fallback_stats["usage"])
+    
+    stats["elapsed"] = time.perf_counter() - started
+    results["stats"] = stats
+    
+    return results
+
+def process_call_job(job, context):
+    """Job handler: run the call pipeline in a trace and return its result along with the spans"""
+    with tracing.trace("process_call", exporter=get_trace_exporter(), enabled=TRACING_ENABLED, **{"job.id": job["id"]}) as call_trace:
+        result = run_call_pipeline(job, context)
+    if call_trace is not None:
+        result["trace"] = call_trace.to_dicts()
+    return result
+
+def run_call_pipeline(job, context):
+    """Transcribe, segment and analyze one call, publishing partial results as it goes"""
+    payload = job["payload"]
+    # A job requeued after a restart has lost the user's key, which was only held in memory;
+    # it is never billed to the deployment's key instead
+    api_key = context.secret("api_key") or (DEFAULT_MISTRAL_API_KEY if payload.get("default_key") else None)
+    if not api_key:
+        raise RuntimeError("The API key for this call is no longer available (the app restarted). Please analyze the call again.")
+    if payload.get("audio_path") and not os.path.exists(payload["audio_path"]):
+        raise RuntimeError("The uploaded audio for this call is no longer available. Please upload it again.")
+    
+    # The upload is kept until the job finishes (see discard_job_upload) so a requeued job can rerun
+    context.update(progress="Transcribing audio")
+    last_upload_report = [0.0]
+    
+    def report_upload(sent, total):
+        # The polling page draws this as a progress bar; writes are throttled like the partial results
+        now = time.monotonic()
+        if sent >= total or now - last_upload_report[0] >= JOB_PARTIAL_FLUSH_INTERVAL:
+            last_upload_report[0] = now
+            context.update(
+                progress=f"Uploading {sent / 1e6:.1f} of {total / 1e6:.1f} MB",
+                partial={"upload": {"sent": sent, "total": total}}
+            )
+    
+    if payload.get("audio_path"):
+        with open(payload["audio_path"], "rb") as audio_file:
+            result, error = transcribe_audio(audio_file=audio_file, api_key=api_key, progress=report_upload, remove_silence=payload.get("remove_silence"))
+    else:
+        result, error = transcribe_audio(audio_url=payload["audio_url"], api_key=api_key, progress=report_upload)
+    if error:
+        raise RuntimeError(error)
+    
+    context.check_cancelled()
+    transcript = result.get("text", "")
+    segments = result.get("segments", [])
+    # Long calls are analyzed in chunks and can't be streamed, so say so instead of silently not streaming
+    progress = "Analyzing call"
+    if uses_map_reduce(transcript) and ((payload.get("mode") or ANALYSIS_MODE) == "per_prompt" or payload.get("stream")):
+        progress = "Analyzing long call in chunks (separate prompts and streaming aren't used for long calls)"
+    context.update(progress=progress, partial={"transcript": transcript, "segments": segments, "sections": {}})
+    
+    sections = {}
+    streamed = {}
+    lock = threading.Lock()
+    last_flush = [0.0]
+    # Seconds from the start of the analysis to the first text the user could see
+    analysis_started = time.perf_counter()
+    first_insight = [None]
+    
+    def publish(force=False):
+        now = time.monotonic()
+        if force or now - last_flush[0] >= JOB_PARTIAL_FLUSH_INTERVAL:
+            last_flush[0] = now
+            context.update(partial={"sections": dict(streamed, **sections)})
+    
+    def on_delta(name, delta):
+        with lock:
+            if first_insight[0] is None:
+                first_insight[0] = time.perf_counter() - analysis_started
+            streamed[name] = streamed.get(name, "") + delta
+            publish()
+    
+    def on_result(name, response, error):
+        with lock:
+            if first_insight[0] is None and not error:
+                first_insight[0] = time.perf_counter() - analysis_started
+            sections[name] = response if not error else ANALYSIS_ERRORS.get(name, f"Error running {name} analysis")
+            publish(force=True)
+    
+    analysis = analyze_call(
+        transcript, segments, mode=payload.get("mode"), api_key=api_key,
+        on_delta=on_delta if payload.get("stream") else None, on_result=on_result
+    )
+    # Structured and map-reduce analyses show everything at once, when they finish
+    analysis["stats"]["first_token"] = first_insight[0] if first_insight[0] is not None else analysis["stats"]["elapsed"]
+    context.check_cancelled()
+    
+    context.update(progress="Saving call")
+    store = build_segment_store(segments)
+    metrics = extract_call_metrics(transcript, segments, store)
+    with tracing.span("save_call", segments=len(segments)):
+        call_id = get_call_store().save_call(
+            transcript, store, analysis, metrics=metrics,
+            source=payload.get("source"), rep=payload.get("rep"), call_date=payload.get("call_date")
+        )
+    
+    return {
+        "call_id": call_id,
+        "cache_status": analysis["cache_status"],
+        "upload_stats": {name: result[name] for name in ("silence_trim", "compression") if name in result}
     }
 
+def discard_job_upload(job):
+    """Delete a finished job's copy of the uploaded audio"""
+    audio_path = (job or {}).get("payload", {}).get("audio_path")
+    if audio_path and os.path.exists(audio_path):
+        os.remove(audio_path)
+
+@st.cache_resource
+def get_job_queue():
+    """Return the process-wide call-processing job queue, starting its workers"""
+    return JobQueue(
+        JOB_DB_PATH,
+        handler=process_call_job,
+        workers=JOB_WORKERS,
+        max_pending_per_user=JOB_MAX_PENDING_PER_USER,
+        max_running_per_user=JOB_MAX_RUNNING_PER_USER,
+        on_finish=discard_job_upload
+    ).start()
+
+def get_user_id():
+    """Identify the user for per-user job limits: their login when the app has one, otherwise this browser session"""
+    # Not the API key: everyone using the deployment's default key would share one set of limits
+    if st.user.get("is_logged_in") and st.user.get("email"):
+        return "user:" + hashlib.sha256(st.user["email"].encode("utf-8")).hexdigest()[:16]
+    return "session:" + st.session_state.session_id
+
+def submit_call_job():
+    """Queue the uploaded file or URL for processing and remember the job ID; returns an error message or None"""
+    payload = {
+        "mode": st.session_state.analysis_mode,
+        "stream": st.session_state.stream_analysis and st.session_state.analysis_mode == "per_prompt",
+        "remove_silence": st.session_state.remove_silence,
+        # Lets a requeued job fall back to the deployment's key only if it was using it anyway
+        "default_key": not st.session_state.api_key,
+        "rep": st.session_state.rep_name.strip() or None,
+        "call_date": st.session_state.call_date.isoformat()
+    }
+    
+    if st.session_state.uploaded_audio:
+        # The upload only lives as long as this session, so the job gets its own copy on disk
+        os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+        extension = os.path.splitext(st.session_state.uploaded_audio.name)[1] or ".mp3"
+        audio_path = os.path.join(JOB_UPLOAD_DIR, uuid.uuid4().hex + extension)
+        st.session_state.uploaded_audio.seek(0)
+        with open(audio_path, "wb") as f:
+            shutil.copyfileobj(st.session_state.uploaded_audio, f, UPLOAD_CHUNK_SIZE)
+        st.session_state.uploaded_audio.seek(0)
+        payload["audio_path"] = audio_path
+        payload["source"] = st.session_state.uploaded_audio.name
+    elif st.session_state.audio_url:
+        payload["audio_url"] = st.session_state.audio_url
+        payload["source"] = st.session_state.audio_url
+    else:
+        return "No audio provided"
+    
+    try:
+        job_id = get_job_queue().submit(get_user_id(), payload, secrets={"api_key": get_api_key()})
+    except JobLimitError as e:
+        if payload.get("audio_path"):
+            os.remove(payload["audio_path"])
+        return str(e)
+    
+    st.session_state.job_id = job_id
+    st.session_state.loaded_job_id = None
+    st.session_state.call_id = None
+    st.session_state.loaded_call_id = None
+    st.query_params["job"] = job_id
+    if "call" in st.query_params:
+        del st.query_params["call"]
+    return None
+
+def load_call_transcript(transcript, segments):
+    """Store a transcript and its derived segmentation in session state"""
+    st.session_state.transcript = transcript
+    st.session_state.segments = segments
+    st.session_state.call_stages = segment_call(segments)
+    st.session_state.segment_store = build_segment_store(segments)
+    st.session_state.segment_store_segments = segments
+
+def clear_call_results():
+    """Reset session state before a new call is loaded"""
+    load_call_transcript("", [])
+    st.session_state.objections = ""
+    st.session_state.competitor_mentions = ""
+    st.session_state.rep_scores = {}
+    st.session_state.coaching_tips = ""
+    st.session_state.analysis_cache_status = {}
+    st.session_state.upload_stats = {}
+    st.session_state.call_trace = None
+
+def open_saved_call(call_id):
+    """Load a call from the call store into session state; returns the call or None"""
+    call = get_call_store().get_call(call_id)
+    if call is None:
+        return None
+    
+    load_call_transcript(call["transcript"], get_call_store().get_segments(call_id))
+    st.session_state.objections = call["objections"] or ""
+    st.session_state.competitor_mentions = call["competitors"] or ""
+    st.session_state.rep_scores = call["scores"]
+    st.session_state.coaching_tips = call["coaching"] or ""
+    st.session_state.analysis_cache_status = {}
+    st.session_state.upload_stats = {}
+    st.session_state.call_trace = None
+    st.session_state.call_id = call_id
+    st.session_state.loaded_call_id = call_id
+    st.query_params["call"] = call_id
+    return call
+
+def sync_saved_call():
+    """Open the call picked in the call history or linked from the URL, reading it only once"""
+    call_id = st.session_state.call_id
+    if call_id and st.session_state.loaded_call_id != call_id:
+        if open_saved_call(call_id) is None:
+            st.session_state.call_id = None
+            st.warning("That call is no longer in the call history.")
+
+def record_analysis_run(stats):
+    """Add a finished analysis to the runs table"""
+    st.session_state.analysis_runs.append({
+        "Mode": stats["mode"],
+        "Requests": stats["requests"],
+        "Seconds": round(stats["elapsed"], 2),
+        "First Insight (s)": round(stats["first_token"], 2) if stats.get("first_token") is not None else None,
+        "Prompt Tokens": stats["usage"].get("prompt_tokens", 0),
+        "Completion Tokens": stats["usage"].get("completion_tokens", 0),
+        "Out of Time": stats.get("timed_out", False)
+    })
+
+def sync_call_job():
+    """Copy the current job's progress into session state; returns the job while it is still active"""
+    job_id = st.session_state.job_id
+    if not job_id:
+        return None
+    
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.session_state.job_id = None
+        return None
+    
+    if job["status"] == "succeeded":
+        # loaded_job_id is already set once the partial transcript is shown, so check the call instead
+        if st.session_state.loaded_call_id != job["result"]["call_id"]:
+            call = open_saved_call(job["result"]["call_id"])
+            if call is not None:
+                st.session_state.analysis_cache_status = job["result"]["cache_status"]
+                st.session_state.upload_stats = job["result"].get("upload_stats", {})
+                st.session_state.call_trace = job["result"].get("trace")
+                record_analysis_run(call["analysis_stats"])
+            st.session_state.loaded_job_id = job_id
+        st.session_state.job_id = None
+        if "job" in st.query_params:
+            del st.query_params["job"]
+        return None
+    
+    if job["status"] in ("failed", "cancelled"):
+        return job
+    
+    partial = job["partial"] or {}
+    if partial.get("transcript") is not None and st.session_state.loaded_job_id != job_id:
+        load_call_transcript(partial["transcript"], partial.get("segments", []))
+        st.session_state.loaded_job_id = job_id
+    
+    sections = partial.get("sections") or {}
+    st.session_state.objections = sections.get("objections", "")
+    st.session_state.competitor_mentions = split_competitor_names(sections.get("competitors", ""))[0]
+    st.session_state.coaching_tips = sections.get("coaching", "")
+    if sections.get("scoring"):
+        st.session_state.rep_scores = parse_rep_scores(sections["scoring"])
+    
+    return job
+
+def render_job_status():
+    """Show the current job's status with a cancel button; returns True while the job is still active"""
+    job = sync_call_job()
+    if job is None:
+        return False
+    
+    if job["status"] == "failed":
+        st.error(f"Error: {job['error']}")
+        st.session_state.job_id = None
+        return False
+    
+    if job["status"] == "cancelled":
+        st.warning("Processing was cancelled.")
+        st.session_state.job_id = None
+        return False
+    
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        message = job["progress"] or job["status"].capitalize()
+        upload = (job["partial"] or {}).get("upload")
+        if st.session_state.transcript:
+            message += " - the transcript is ready to browse and the analysis tabs fill in as each section finishes."
+            st.info(message)
+        elif upload and upload["total"] and message.startswith("Uploading"):
+            st.progress(min(upload["sent"] / upload["total"], 1.0), text=message)
+        else:
+            st.info(message)
+    with col2:
+        if st.button("Cancel", use_container_width=True):
+            get_job_queue().cancel(job["id"])
+            st.rerun()
+    return True
+
 def render_header():
     """Render the app header"""
     st.markdown("<h1 class='main-header'>RepRadar</h1>", unsafe_allow_html=True)
@@ -365,16 +1792,95 @@ def render_header():
     
     # API Key Configuration
     with st.expander("API Configuration"):
-        st.markdown("<p>Enter your <a href='https://console.mistral.ai/' target='_blank'>Mistral AI API key</a> below to use the app.</p>", unsafe_allow_html=True)
-        api_key = st.text_input("Mistral API Key", type="password", placeholder="Enter your API key here", value=st.session_state.api_key)
-        
-        if api_key:
-            st.session_state.api_key = api_key
-            st.success("API key saved! You can now analyze sales calls.")
-        elif DEFAULT_MISTRAL_API_KEY:
-            st.info("Using default API key from environment. You can provide your own API key above.")
-        else:
-            st.warning("No API key provided. Please enter a Mistral API key to use the app.")
+        render_api_settings()
+
+@st.fragment
+def render_api_settings():
+    """Render the API key and analysis settings; edits here rerun only this section"""
+    st.markdown("<p>Enter your <a href='https://console.mistral.ai/' target='_blank'>Mistral AI API key</a> below to use the app.</p>", unsafe_allow_html=True)
+    api_key = st.text_input("Mistral API Key", type="password", placeholder="Enter your API key here", value=st.session_state.api_key)
+    
+    if api_key:
+        st.session_state.api_key = api_key
+        st.success("API key saved! You can now analyze sales calls.")
+    elif DEFAULT_MISTRAL_API_KEY:
+        st.info("Using default API key from environment. You can provide your own API key above.")
+    else:
+        st.warning("No API key provided. Please enter a Mistral API key to use the app.")
+    
+    st.session_state.analysis_mode = st.selectbox(
+        "Analysis mode",
+        options=list(ANALYSIS_MODES.keys()),
+        format_func=ANALYSIS_MODES.get,
+        index=list(ANALYSIS_MODES.keys()).index(st.session_state.analysis_mode)
+    )
+    
+    st.session_state.remove_silence = st.checkbox(
+        "Trim long silences before upload",
+        value=st.session_state.remove_silence,
+        help=f"Cuts silences longer than {SILENCE_MIN_SECONDS:g}s from uploaded files before transcription; timestamps still match the original recording."
+    )
+    
+    st.session_state.stream_analysis = st.checkbox(
+        "Stream analysis as it is generated",
+        value=st.session_state.stream_analysis,
+        disabled=st.session_state.analysis_mode != "per_prompt",
+        help=f"Shows objections, scores and coaching progressively. Only available with \"{ANALYSIS_MODES['per_prompt']}\"."
+    )
+    
+    cache_stats = get_transcription_cache().stats()
+    st.caption(f"Transcription cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+               f"{cache_stats['entries']} entries ({cache_stats['bytes'] / (1024 * 1024):.1f} MB)")
+    
+    for endpoint, metrics in get_mistral_client().metrics().items():
+        caption = (f"{endpoint}: {metrics['requests']} requests, {metrics['retries']} retries, "
+                   f"{metrics['throttled']} throttled, {metrics['hedged']} hedged ({metrics['hedge_wins']} won), "
+                   f"avg queue delay {metrics['queue_delay_avg'] * 1000:.0f} ms")
+        if metrics["latency_p95"] is not None:
+            caption += f", p95 {metrics['latency_p95']:.1f}s"
+        if metrics["circuit_retry_in"]:
+            caption += f", failing fast for {metrics['circuit_retry_in']:.0f}s"
+        st.caption(caption)
+
+def render_call_history():
+    """Render the sidebar list of saved calls"""
+    call_store = get_call_store()
+    
+    with st.sidebar:
+        st.markdown("<h3 class='sub-header'>Call History</h3>", unsafe_allow_html=True)
+        
+        rep = st.selectbox("Rep", ["All reps"] + call_store.reps())
+        competitor = st.selectbox("Competitor mentioned", ["Any competitor"] + call_store.competitors())
+        dates = st.date_input("Call dates", value=[], help="Pick a start and end date to narrow the list")
+        
+        calls = call_store.list_calls(
+            rep=None if rep == "All reps" else rep,
+            competitor=None if competitor == "Any competitor" else competitor,
+            since=dates[0] if len(dates) == 2 else None,
+            until=dates[1] if len(dates) == 2 else None,
+            limit=CALL_HISTORY_LIMIT
+        )
+        if not calls:
+            st.caption("No saved calls match.")
+            return
+        
+        calls_by_id = {call["id"]: call for call in calls}
+        
+        def describe(call_id):
+            call = calls_by_id[call_id]
+            source = os.path.basename(call["source"] or "") or "Untitled call"
+            return f"{call['call_date']} · {call['rep'] or 'Unassigned'} · {source}"
+        
+        ids = list(calls_by_id)
+        selected = st.selectbox(
+            "Call", ids, format_func=describe,
+            index=ids.index(st.session_state.call_id) if st.session_state.call_id in calls_by_id else 0
+        )
+        call = calls_by_id[selected]
+        st.caption(f"{call['duration'] / 60:.1f} min · talk ratio {call['talk_ratio'] or 0:.2f}")
+        
+        if st.button("Open call", use_container_width=True, disabled=selected == st.session_state.loaded_call_id):
+            st.session_state.call_id = selected
 
 def render_audio_upload():
     """Render the audio upload section"""
@@ -395,6 +1901,12 @@ def render_audio_upload():
         if audio_url:
             st.session_state.audio_url = audio_url
             st.markdown(f"Audio URL: {audio_url}")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.session_state.rep_name = st.text_input("Rep name (optional)", value=st.session_state.rep_name, placeholder="Who ran the call?")
+    with col2:
+        st.session_state.call_date = st.date_input("Call date", value=st.session_state.call_date)
             
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
@@ -407,39 +1919,23 @@ def render_audio_upload():
                 st.error("Please upload an audio file or provide an audio URL")
 
 def process_audio():
-    """Process the uploaded audio file or URL"""
-    with st.spinner("Processing audio... This may take a minute."):
-        # Transcribe audio  
-        if st.session_state.uploaded_audio:
-            result, error = transcribe_audio(audio_file=st.session_state.uploaded_audio)
-        elif st.session_state.audio_url:
-            result, error = transcribe_audio(audio_url=st.session_state.audio_url)
-        else:
-            st.error("No audio provided")
-            return
-        
-        if error:
-            st.error(f"Error: {error}")
-            return
-        
-        # Store transcript and segments
-        st.session_state.transcript = result.get("text", "")
-        st.session_state.segments = result.get("segments", [])
-        
-        # Segment the call
-        st.session_state.call_stages = segment_call(st.session_state.segments)
-        
-        # Analyze the call
-        with st.spinner("Analyzing call content..."):
-            analysis_results = analyze_call(st.session_state.transcript, st.session_state.segments)
-            st.session_state.objections = analysis_results["objections"]
-            st.session_state.competitor_mentions = analysis_results["competitors"]
-            st.session_state.rep_scores = analysis_results["scores"]
-            st.session_state.coaching_tips = analysis_results["coaching"]
-        
-        # Set active tab to results
-        st.session_state.active_tab = 1
-        st.rerun()
+    """Queue the uploaded audio file or URL for background processing"""
+    # Fail fast instead of queueing a job that the open breaker would reject anyway
+    retry_in = get_mistral_client().circuit_retry_in("audio/transcriptions")
+    if retry_in:
+        st.error(f"The Mistral transcription API is failing right now. Please try again in {retry_in:.0f} seconds.")
+        return
+    
+    error = submit_call_job()
+    if error:
+        st.error(error)
+        return
+    
+    clear_call_results()
+    
+    # Set active tab to results
+    st.session_state.active_tab = 1
+    st.rerun()
 
 def render_results_tabs():
     """Render the results in tabs"""
@@ -448,6 +1944,27 @@ def render_results_tabs():
     
     st.markdown("<h2 class='sub-header'>Call Analysis Results</h2>", unsafe_allow_html=True)
     
+    silence_trim = st.session_state.upload_stats.get("silence_trim")
+    if silence_trim:
+        removed = silence_trim["original_seconds"] - silence_trim["uploaded_seconds"]
+        st.caption(
+            f"Trimmed {format_timestamp(removed)} of silence before upload "
+            f"({removed / silence_trim['original_seconds']:.0%} less audio, "
+            f"{silence_trim['uploaded_bytes'] / (1024 * 1024):.1f} MB sent instead of {silence_trim['original_bytes'] / (1024 * 1024):.1f} MB)"
+        )
+    
+    compression = st.session_state.upload_stats.get("compression")
+    if compression:
+        st.caption(
+            f"Compressed to {compression['sample_rate'] // 1000} kHz mono {compression['format'].upper()} before upload: "
+            f"{compression['original_bytes'] / (1024 * 1024):.1f} MB → {compression['uploaded_bytes'] / (1024 * 1024):.1f} MB "
+            f"({compression['ratio']:.1f}x smaller, about {max(0.0, compression['seconds_saved']):.1f}s of upload saved)"
+        )
+    
+    if st.session_state.analysis_runs:
+        with st.expander("Analysis runs"):
+            st.dataframe(pd.DataFrame(st.session_state.analysis_runs), use_container_width=True, hide_index=True)
+    
     tabs = st.tabs(["Transcript", "Overview", "Objections", "Rep Performance", "Coaching"])
     
     with tabs[0]:
@@ -464,64 +1981,189 @@ def render_results_tabs():
     
     with tabs[4]:
         render_coaching_tab()
+    
+    if TRACING_ENABLED:
+        render_trace_panel()
+
+def traced_tab(render):
+    """Trace each render of a results tab and keep its spans for the debug panel"""
+    # Tabs rerun every second while a job is polled, so their traces are not exported one by one;
+    # their durations only go into the Prometheus metrics
+    @functools.wraps(render)
+    def wrapper():
+        with tracing.trace(render.__name__, enabled=TRACING_ENABLED) as render_trace:
+            render()
+        if render_trace is not None:
+            st.session_state.render_traces[render.__name__] = render_trace.to_dicts()
+            get_trace_exporter().observe(render_trace)
+    return wrapper
 
+def trace_rows(spans):
+    """Flatten span dicts into waterfall rows, each listed and indented under its parent and offset from the first start"""
+    span_ids = {span["span_id"] for span in spans}
+    children = {}
+    for span in spans:
+        parent_id = span["parent_id"] if span["parent_id"] in span_ids else None
+        children.setdefault(parent_id, []).append(span)
+    
+    ordered = []
+    stack = [(span, 0) for span in reversed(children.get(None, []))]
+    while stack:
+        span, depth = stack.pop()
+        ordered.append((span, depth))
+        stack.extend((child, depth + 1) for child in reversed(children.get(span["span_id"], [])))
+    
+    started = min(span["start_ns"] for span in spans)
+    rows = []
+    for span, depth in ordered:
+        attributes = span["attributes"]
+        rows.append({
+            "Stage": "\u2003" * depth + span["name"],
+            "Start (ms)": round((span["start_ns"] - started) / 1e6, 1),
+            "Duration (ms)": round((span["end_ns"] - span["start_ns"]) / 1e6, 1),
+            "Status": span["error"] or span["status"],
+            "HTTP": attributes.get("http.status_code"),
+            "Retries": attributes.get("http.retries"),
+            "Sent (KB)": round(attributes["http.request.body.size"] / 1024, 1) if "http.request.body.size" in attributes else None,
+            "Received (KB)": round(attributes["http.response.body.size"] / 1024, 1) if "http.response.body.size" in attributes else None,
+            "Input Tokens": attributes.get("gen_ai.usage.input_tokens"),
+            "Output Tokens": attributes.get("gen_ai.usage.output_tokens"),
+            "Cached": attributes.get("cache.hit")
+        })
+    return rows
+
+def build_waterfall_figure(rows):
+    """Build a waterfall chart with one bar per span"""
+    fig = go.Figure(go.Bar(
+        y=[f"{i:>3} {row['Stage']}" for i, row in enumerate(rows)],
+        x=[max(row["Duration (ms)"], 0.1) for row in rows],
+        base=[row["Start (ms)"] for row in rows],
+        orientation="h",
+        marker_color=["#EF553B" if row["Status"] not in ("ok", "unset") else "#636EFA" for row in rows],
+        hovertemplate="%{y}<br>start %{base} ms<br>%{x} ms<extra></extra>"
+    ))
+    fig.update_layout(
+        height=max(200, 22 * len(rows) + 60),
+        margin=dict(l=10, r=10, t=10, b=30),
+        xaxis_title="ms",
+        yaxis=dict(autorange="reversed", tickfont=dict(family="monospace"))
+    )
+    return fig
+
+def render_trace_panel():
+    """Show the pipeline waterfall for the current call and the latest tab renders"""
+    with st.expander("Debug: pipeline trace"):
+        if st.session_state.call_trace:
+            rows = trace_rows(st.session_state.call_trace)
+            st.markdown("**Call processing**")
+            st.plotly_chart(build_waterfall_figure(rows), use_container_width=True)
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No processing trace for this call (it was opened from the call history or traced before a restart).")
+        
+        render_spans = [span for spans in st.session_state.render_traces.values() for span in spans]
+        if render_spans:
+            rows = trace_rows(render_spans)
+            st.markdown("**Latest render of each tab**")
+            st.plotly_chart(build_waterfall_figure(rows), use_container_width=True)
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+def transcript_rows(store):
+    """Return the indices of the segments that pass the transcript tab's stage and speaker filters"""
+    mask = np.ones(len(store), dtype=bool)
+    stages = st.session_state.get("transcript_stages")
+    if stages:
+        mask &= np.isin(store.stage, [CALL_STAGES.index(stage) for stage in stages])
+    speakers = st.session_state.get("transcript_speakers")
+    if speakers:
+        mask &= np.isin(store.speaker, [SPEAKERS.index(speaker) for speaker in speakers])
+    return np.flatnonzero(mask)
+
+def queue_transcript_jump():
+    """Remember the timestamp typed into the jump box until the table is next rendered"""
+    st.session_state.transcript_jump = st.session_state.transcript_jump_input
+
+@st.fragment
+@traced_tab
 def render_transcript_tab():
     """Render the transcript tab"""
     st.markdown("### Call Transcript with Timestamps")
     
     if st.session_state.segments:
-        # Create a DataFrame for the transcript segments
-        segments_data = []
-        for segment in st.session_state.segments:
-            segments_data.append({
-                "Start": f"{segment['start']:.1f}s",
-                "End": f"{segment['end']:.1f}s",
-                "Duration": f"{segment['end'] - segment['start']:.1f}s",
-                "Text": segment["text"]
-            })
-        
-        # Display as a DataFrame
-        df = pd.DataFrame(segments_data)
-        st.dataframe(df, use_container_width=True, hide_index=True)
-        
-        # Call segmentation
-        st.markdown("### Call Segmentation")
-        col1, col2, col3, col4, col5 = st.columns(5)
+        store = get_segment_store()
         
+        col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
         with col1:
-            st.markdown("**Intro**")
-            intro_text = " ".join([s["text"] for s in st.session_state.call_stages.get("intro", [])])
-            st.markdown(f"<div style='height:150px;overflow-y:auto;font-size:0.9em;'>{intro_text}</div>", unsafe_allow_html=True)
-        
+            st.multiselect("Stages", CALL_STAGES, format_func=str.capitalize, key="transcript_stages", placeholder="All stages")
         with col2:
-            st.markdown("**Discovery**")
-            discovery_text = " ".join([s["text"] for s in st.session_state.call_stages.get("discovery", [])])
-            st.markdown(f"<div style='height:150px;overflow-y:auto;font-size:0.9em;'>{discovery_text}</div>", unsafe_allow_html=True)
-        
+            st.multiselect("Speakers", SPEAKERS, key="transcript_speakers", placeholder="Both speakers")
         with col3:
-            st.markdown("**Demo**")
-            demo_text = " ".join([s["text"] for s in st.session_state.call_stages.get("demo", [])])
-            st.markdown(f"<div style='height:150px;overflow-y:auto;font-size:0.9em;'>{demo_text}</div>", unsafe_allow_html=True)
-        
+            page_size = st.selectbox("Rows per page", TRANSCRIPT_PAGE_SIZES, index=1, key="transcript_page_size")
         with col4:
-            st.markdown("**Objections**")
-            objections_text = " ".join([s["text"] for s in st.session_state.call_stages.get("objections", [])])
-            st.markdown(f"<div style='height:150px;overflow-y:auto;font-size:0.9em;'>{objections_text}</div>", unsafe_allow_html=True)
-        
-        with col5:
-            st.markdown("**Closing**")
-            closing_text = " ".join([s["text"] for s in st.session_state.call_stages.get("closing", [])])
-            st.markdown(f"<div style='height:150px;overflow-y:auto;font-size:0.9em;'>{closing_text}</div>", unsafe_allow_html=True)
+            st.number_input(
+                "Jump to (seconds)", min_value=0.0, max_value=float(store.call_duration), value=None, step=10.0,
+                key="transcript_jump_input", on_change=queue_transcript_jump
+            )
+        
+        rows = transcript_rows(store)
+        page_count = max(1, -(-len(rows) // page_size))
+        
+        # Open the page holding the requested moment: the last segment starting at or before it
+        if st.session_state.transcript_jump is not None:
+            position = max(0, int(np.searchsorted(store.start[rows], st.session_state.transcript_jump, side="right")) - 1)
+            st.session_state.transcript_page = position // page_size + 1
+            st.session_state.transcript_jump = None
+        if st.session_state.get("transcript_page", 1) > page_count:
+            st.session_state.transcript_page = page_count
+        
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="transcript_page")
+        page_rows = rows[(page - 1) * page_size:page * page_size]
+        
+        # Display as a numeric DataFrame so the time columns sort as numbers
+        st.dataframe(
+            store.to_frame(page_rows)[["Start", "End", "Duration", "Speaker", "Stage", "Text"]],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Start": st.column_config.NumberColumn(format="%.1fs"),
+                "End": st.column_config.NumberColumn(format="%.1fs"),
+                "Duration": st.column_config.NumberColumn(format="%.1fs")
+            }
+        )
+        if len(page_rows):
+            st.caption(f"Segments {(page - 1) * page_size + 1}–{(page - 1) * page_size + len(page_rows)} of {len(rows)}")
+        else:
+            st.caption("No segments match the filters")
+        
+        # Call segmentation
+        st.markdown("### Call Segmentation")
+        columns = st.columns(len(CALL_STAGES))
+        
+        aggregates = store.stage_aggregates()
+        
+        for column, stage in zip(columns, CALL_STAGES):
+            with column:
+                st.markdown(f"**{stage.capitalize()}**")
+                st.caption(f"{aggregates[stage]['segments']} segments · {format_timestamp(aggregates[stage]['duration'])}")
+                # Long stages are previewed; filter the table by stage to read all of it
+                stage_text = store.stage_text(stage)
+                if len(stage_text) > STAGE_PREVIEW_CHARS:
+                    stage_text = stage_text[:STAGE_PREVIEW_CHARS] + "…"
+                st.markdown(f"<div style='height:150px;overflow-y:auto;font-size:0.9em;'>{stage_text}</div>", unsafe_allow_html=True)
     else:
         st.warning("No transcript segments available")
 
+@st.fragment
+@traced_tab
 def render_overview_tab():
     """Render the overview tab"""
     st.markdown("### Call Overview")
     
     if st.session_state.transcript and st.session_state.segments:
+        store = get_segment_store()
+        
         # Extract metrics
-        metrics = extract_call_metrics(st.session_state.transcript, st.session_state.segments)
+        metrics = get_call_metrics(store.digest(), st.session_state.transcript, store)
         
         # Display metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -543,72 +2185,44 @@ def render_overview_tab():
         # Create a timeline visualization
         st.markdown("### Call Timeline")
         
-        if st.session_state.segments:
-            # Create a DataFrame for the timeline
-            timeline_data = []
-            for i, segment in enumerate(st.session_state.segments):
-                # Simple alternating speaker assignment - odd segments are rep, even are customer
-                speaker = "Rep" if i % 2 == 0 else "Customer"
-                
-                # Determine segment type based on call stages
-                segment_type = "Unknown"
-                for stage_name, stage_segments in st.session_state.call_stages.items():
-                    if segment in stage_segments:
-                        segment_type = stage_name.capitalize()
-                        break
-                
-                timeline_data.append({
-                    "Start": segment["start"],
-                    "End": segment["end"],
-                    "Speaker": speaker,
-                    "Type": segment_type,
-                    "Text": segment["text"][:50] + "..." if len(segment["text"]) > 50 else segment["text"]
-                })
-            
-            # Create a Gantt chart
-            fig = px.timeline(
-                timeline_data,
-                x_start="Start",
-                x_end="End",
-                y="Speaker",
-                color="Type",
-                hover_data=["Text"],
-                title="Call Timeline by Speaker and Stage"
+        window = None
+        if len(store) > TIMELINE_MAX_SPANS:
+            # Long calls are drawn at reduced detail; zooming in on a stretch restores it
+            duration = max(1.0, store.call_duration)
+            window = st.slider(
+                "Zoom to (seconds)", 0.0, duration, (0.0, duration), step=float(max(1, round(duration / 500))),
+                help="Nearby segments are merged to keep the chart fast; narrow the range to see each segment."
             )
-            
-            # Update layout
-            fig.update_layout(
-                xaxis_title="Time (seconds)",
-                yaxis_title="Speaker",
-                height=300,
-                margin=dict(l=10, r=10, t=50, b=30)
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Word cloud or highlight keywords
-            st.markdown("### Key Topics & Highlights")
-            
-            # Display highlights using a simple bulleted list
-            keywords = ["price", "cost", "budget", "competitor", "timeline", "deadline", "alternative", "concern", "issue"]
-            highlights = []
-            
-            for segment in st.session_state.segments:
-                for keyword in keywords:
-                    if keyword in segment["text"].lower():
-                        highlights.append(f"• {segment['text']}")
-                        break
-            
-            if highlights:
-                st.markdown("\n".join(highlights))
-            else:
-                st.info("No key highlights detected")
+        st.plotly_chart(build_timeline_figure(store.digest(), store, window), use_container_width=True)
+        
+        # Word cloud or highlight keywords
+        st.markdown("### Key Topics & Highlights")
+        
+        scan = get_lexicon_scan()
+        counts = scan.counts()
+        st.caption(" · ".join(f"{name.capitalize()}: {counts.get(name, 0)}" for name in HIGHLIGHT_LEXICONS if name in counts))
+        
+        # Display highlights using a simple bulleted list with the matched terms marked
+        highlights = build_highlights_html(store.digest(), store, scan)
+        
+        if highlights:
+            st.markdown(highlights, unsafe_allow_html=True)
+        else:
+            st.info("No key highlights detected")
     else:
         st.warning("No call data available")
 
+def render_cache_badge(name):
+    """Show a small badge when an analysis section was served from the response cache"""
+    if st.session_state.analysis_cache_status.get(name):
+        st.caption("⚡ cached")
+
+@st.fragment
+@traced_tab
 def render_objections_tab():
     """Render the objections tab"""
     st.markdown("### Customer Objections")
+    render_cache_badge("objections")
     
     if st.session_state.objections:
         st.markdown("<div class='warning-box'>" + st.session_state.objections + "</div>", unsafe_allow_html=True)
@@ -616,50 +2230,25 @@ def render_objections_tab():
         st.info("No objections analysis available")
     
     st.markdown("### Competitor Mentions")
+    render_cache_badge("competitors")
     
     if st.session_state.competitor_mentions:
         st.markdown("<div class='info-box'>" + st.session_state.competitor_mentions + "</div>", unsafe_allow_html=True)
     else:
         st.info("No competitor mentions detected")
 
+@st.fragment
+@traced_tab
 def render_performance_tab():
     """Render the performance tab"""
     st.markdown("### Rep Performance Scores")
+    render_cache_badge("scoring")
     
     if st.session_state.rep_scores:
         scores = st.session_state.rep_scores
         
         # Create radar chart
-        categories = list(scores.keys())
-        values = list(scores.values())
-        
-        # Add the first value at the end to close the loop
-        categories.append(categories[0])
-        values.append(values[0])
-        
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatterpolar(
-            r=values,
-            theta=categories,
-            fill='toself',
-            name='Rep Performance',
-            line_color='#3B82F6',
-            fillcolor='rgba(59, 130, 246, 0.3)'
-        ))
-        
-        fig.update_layout(
-            polar=dict(
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 10]
-                )
-            ),
-            showlegend=False,
-            height=400
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_radar_figure(tuple(scores.items())), use_container_width=True)
         
         # Display scores as metrics
         cols = st.columns(len(scores))
@@ -672,43 +2261,17 @@ def render_performance_tab():
         
         if st.session_state.segments:
             # Calculate talk time distribution
-            rep_time = 0
-            customer_time = 0
-            
-            for i, segment in enumerate(st.session_state.segments):
-                duration = segment.get("end", 0) - segment.get("start", 0)
-                # Simple alternating assignment
-                if i % 2 == 0:
-                    rep_time += duration
-                else:
-                    customer_time += duration
-            
-            total_time = rep_time + customer_time
-            
-            # Create data for pie chart
-            labels = ['Rep', 'Customer']
-            values = [rep_time, customer_time]
-            
-            fig = go.Figure(data=[go.Pie(
-                labels=labels,
-                values=values,
-                hole=.4,
-                marker_colors=['#3B82F6', '#10B981']
-            )])
-            
-            fig.update_layout(
-                title="Talk Time Distribution",
-                annotations=[dict(text=f'{rep_time/total_time:.0%}<br>Rep', x=0.5, y=0.5, font_size=15, showarrow=False)],
-                height=300
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
+            rep_time, customer_time = get_segment_store().talk_time()
+            st.plotly_chart(build_talk_time_figure(rep_time, customer_time), use_container_width=True)
     else:
         st.warning("No performance metrics available")
 
+@st.fragment
+@traced_tab
 def render_coaching_tab():
     """Render the coaching tab"""
     st.markdown("### Coaching Recommendations")
+    render_cache_badge("coaching")
     
     if st.session_state.coaching_tips:
         st.markdown("<div class='success-box'>" + st.session_state.coaching_tips + "</div>", unsafe_allow_html=True)
@@ -746,22 +2309,111 @@ def render_footer():
         unsafe_allow_html=True
     )
 
-def main():
-    """Main function to run the app"""
-    # Render the header
-    render_header()
+def format_timestamp(seconds):
+    """Format seconds as m:ss"""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+def render_search_page():
+    """Render full-text search across every saved call"""
+    call_store = get_call_store()
     
+    st.markdown("<h2 class='sub-header'>Search Calls</h2>", unsafe_allow_html=True)
+    query = st.text_input(
+        "Search transcripts",
+        placeholder='e.g. "acme crm" pric*',
+        help='Every word must match. Use "quotes" for exact phrases and a trailing * for prefixes.'
+    )
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        rep = st.selectbox("Rep", ["All reps"] + call_store.reps(), key="search_rep")
+    with col2:
+        speaker = st.selectbox("Speaker", ["Anyone", "Rep", "Customer"], key="search_speaker")
+    with col3:
+        dates = st.date_input("Call dates", value=[], key="search_dates")
+    
+    if query.strip():
+        started = time.perf_counter()
+        hits, ranked = call_store.search(
+            query,
+            rep=None if rep == "All reps" else rep,
+            speaker=None if speaker == "Anyone" else speaker,
+            since=dates[0] if len(dates) == 2 else None,
+            until=dates[1] if len(dates) == 2 else None,
+            limit=SEARCH_RESULT_LIMIT
+        )
+        order = "best match first" if ranked else "too many matches to rank, newest first"
+        st.caption(f"{len(hits)} segments ({order}) in {(time.perf_counter() - started) * 1000:.0f} ms")
+        
+        for hit in hits:
+            snippet = html.escape(hit["snippet"]).replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>")
+            source = os.path.basename(hit["source"] or "") or "Untitled call"
+            col1, col2 = st.columns([5, 1])
+            with col1:
+                st.markdown(
+                    f"<strong>{html.escape(hit['call_date'])} · {html.escape(hit['rep'] or 'Unassigned')} · {html.escape(source)}</strong> "
+                    f"&nbsp;{format_timestamp(hit['start'])}–{format_timestamp(hit['end'])} · {hit['speaker']} · {(hit['stage'] or '').capitalize()}"
+                    f"<br>{snippet}",
+                    unsafe_allow_html=True
+                )
+            with col2:
+                if st.button("Open call", key=f"open-{hit['call_id']}-{hit['idx']}", use_container_width=True):
+                    st.session_state.call_id = hit["call_id"]
+                    st.session_state.transcript_jump = hit["start"]
+                    st.switch_page(app_pages()["analyze"])
+    
+    render_footer()
+
+def render_analyze_page():
+    """Render the upload form, the current job and the results of the open call"""
     # Render the audio upload section
     render_audio_upload()
     
     # Show a separator
     st.markdown("---")
     
+    # Show the status of a call that is still processing
+    job_active = render_job_status()
+    
+    # Render the saved-call history in the sidebar and open the picked call
+    render_call_history()
+    sync_saved_call()
+    
     # Render results if available
     render_results_tabs()
     
     # Render footer
     render_footer()
+    
+    # Poll the job until it finishes
+    if job_active:
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+
+def app_pages():
+    """Return the app's pages"""
+    return {
+        "analyze": st.Page(render_analyze_page, title="Analyze Call", icon="🎙️", url_path="analyze", default=True),
+        "search": st.Page(render_search_page, title="Search Calls", icon="🔍", url_path="search")
+    }
+
+def main():
+    """Main function to run the app"""
+    st.set_page_config(
+        page_title="RepRadar - AI-Powered Sales Call Intelligence",
+        page_icon="📊",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    
+    init_session_state()
+    inject_styles()
+    
+    # Render the header
+    render_header()
+    
+    st.navigation(list(app_pages().values())).run()
 
 # Run the app
 if __name__ == "__main__":
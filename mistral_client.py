@@ -0,0 +1,415 @@
+import json
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import tracing
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# (connect timeout, read timeout, overall deadline including retries) in seconds
+DEFAULT_ENDPOINT_TIMEOUTS = {
+    "audio/transcriptions": (10, 600, 900),
+    "chat/completions": (10, 120, 300)
+}
+
+
+class RateLimiter:
+    """Thread-safe token bucket shared by every request sent through the client"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request token is available and return the seconds spent waiting"""
+        started = time.monotonic()
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return now - started
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds requested by a Retry-After header, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _start_thread(fn, *args):
+    """Run fn(*args) on a new daemon thread right away and return a Future for its result"""
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True, name="repradar-hedge").start()
+    return future
+
+def _latency_key(endpoint, kwargs):
+    """Group requests whose response times are comparable
+
+    Streamed requests are timed to their headers and others to the full reply, structured
+    outputs take longer than free text, and generation time grows with the prompt, so each
+    combination of those gets its own window. Prompt sizes are bucketed in powers of four.
+    """
+    payload = kwargs.get("json")
+    body = payload if payload is not None else kwargs.get("data")
+    size = len(body) if isinstance(body, (str, bytes)) else len(json.dumps(body, default=str))
+    structured = isinstance(payload, dict) and "response_format" in payload
+    return endpoint, bool(kwargs.get("stream")), structured, max(0, size.bit_length() - 1) // 2
+
+def _close_response(future):
+    """Release the connection held by a hedged attempt that lost"""
+    if future.exception() is None:
+        future.result()[0].close()
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request while an endpoint's circuit breaker is open"""
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Raised when the caller's deadline passes before a request could complete"""
+
+
+class LatencyWindow:
+    """Rolling window of recent successful response times for one kind of request"""
+
+    def __init__(self, size=200):
+        self.samples = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def quantile(self, q, min_samples=20):
+        """Return the q-quantile of the window, or None until it holds min_samples"""
+        with self.lock:
+            if len(self.samples) < min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Per-endpoint breaker that opens after consecutive failed requests and lets one trial through after a cooldown"""
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def retry_in(self):
+        """Return the seconds until requests are allowed again (0 when closed)"""
+        with self.lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def allow(self):
+        """Return True if a request may be sent now; after the cooldown only one trial request is let through"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() < self.opened_at + self.cooldown or self.trial_running:
+                return False
+            self.trial_running = True
+            return True
+
+    def record(self, success):
+        """Record a request's outcome; None (e.g. cut short by the caller's deadline) counts as neither"""
+        with self.lock:
+            self.trial_running = False
+            if success is None:
+                return
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.threshold:
+                # Trips, or a failed trial request restarts the cooldown
+                self.opened_at = time.monotonic()
+
+
+class MistralClient:
+    """Process-wide Mistral API client with pooled connections, deadlines, retries, rate limiting,
+    hedged requests and per-endpoint circuit breakers"""
+
+    # A request still unanswered after the observed hedge_quantile latency of comparable requests
+    # (see _latency_key) gets a duplicate, and whichever replies first wins. Requests with no
+    # comparable history are never hedged. Only bodies that can be sent twice (JSON, form fields)
+    # are hedged, so streamed file uploads never go out twice. 429s don't trip the breakers: they
+    # are usually one API key's quota, not an outage, and the breakers are shared by every key.
+
+    def __init__(self, base_url, rate_limit=0, burst=None, max_retries=4, backoff_base=0.5, backoff_max=30.0,
+                 pool_size=32, endpoint_timeouts=None, hedge_quantile=0.95, hedge_min_delay=0.5,
+                 breaker_threshold=5, breaker_cooldown=30.0):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.endpoint_timeouts = dict(DEFAULT_ENDPOINT_TIMEOUTS, **(endpoint_timeouts or {}))
+        self.limiter = None
+        self.set_rate_limit(rate_limit, burst)
+        # hedge_quantile=None disables hedging, breaker_threshold=0 disables the breakers
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._latencies = {}
+        self._breakers = {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    def set_rate_limit(self, rate, burst=None):
+        """Set the request rate in requests per second shared by all callers (0 disables it)"""
+        self.limiter = RateLimiter(rate, burst) if rate and rate > 0 else None
+
+    def _record(self, endpoint, **values):
+        with self._metrics_lock:
+            metrics = self._metrics.setdefault(endpoint, {
+                "requests": 0, "attempts": 0, "retries": 0, "throttled": 0, "failures": 0,
+                "hedged": 0, "hedge_wins": 0, "rejected": 0,
+                "queue_delay_total": 0.0, "queue_delay_max": 0.0, "latency_total": 0.0
+            })
+            for key, value in values.items():
+                if key == "queue_delay_max":
+                    metrics[key] = max(metrics[key], value)
+                else:
+                    metrics[key] += value
+
+    def metrics(self):
+        """Return a snapshot of per-endpoint request, retry, hedging, queueing-delay and breaker counters"""
+        with self._metrics_lock:
+            snapshot = {}
+            for endpoint, metrics in self._metrics.items():
+                snapshot[endpoint] = dict(metrics)
+                attempts = metrics["attempts"] or 1
+                snapshot[endpoint]["queue_delay_avg"] = metrics["queue_delay_total"] / attempts
+                snapshot[endpoint]["latency_avg"] = metrics["latency_total"] / (metrics["requests"] or 1)
+                snapshot[endpoint]["latency_p95"] = self._latency_p95(endpoint)
+                snapshot[endpoint]["circuit_retry_in"] = self.circuit_retry_in(endpoint)
+            return snapshot
+
+    def _latency_window(self, key):
+        # setdefault is atomic, so concurrent first requests share one window
+        return self._latencies.get(key) or self._latencies.setdefault(key, LatencyWindow())
+
+    def _latency_p95(self, endpoint):
+        """Return the p95 of the endpoint's most common kind of request, or None without enough samples"""
+        windows = [window for key, window in list(self._latencies.items()) if key[0] == endpoint]
+        if not windows:
+            return None
+        return max(windows, key=lambda window: len(window.samples)).quantile(0.95)
+
+    def _breaker(self, endpoint):
+        return self._breakers.get(endpoint) or self._breakers.setdefault(endpoint, CircuitBreaker(self.breaker_threshold, self.breaker_cooldown))
+
+    def circuit_retry_in(self, endpoint):
+        """Return the seconds until an open breaker lets requests to endpoint through again (0 when closed)"""
+        return self._breaker(endpoint).retry_in() if self.breaker_threshold else 0.0
+
+    def _send(self, endpoint, url, timeout, kwargs):
+        """Send one attempt, hedging it with a duplicate if it runs past the usual latency of comparable requests"""
+        window = hedge_after = None
+        if self.hedge_quantile and ("json" in kwargs or isinstance(kwargs.get("data"), (dict, str, bytes))):
+            window = self._latency_window(_latency_key(endpoint, kwargs))
+            hedge_after = window.quantile(self.hedge_quantile)
+        if hedge_after is None:
+            response, seconds = self._timed_post(url, timeout, kwargs)
+            if window is not None and response.status_code < 400:
+                window.add(seconds)
+            return response
+
+        # Each attempt gets its own thread at once, so the hedge clock starts when the request does
+        primary = _start_thread(self._timed_post, url, timeout, kwargs)
+        if not wait([primary], timeout=max(hedge_after, self.hedge_min_delay)).done:
+            if self.limiter:
+                self.limiter.acquire()
+            self._record(endpoint, hedged=1)
+            tracing.set_attributes(**{"http.hedged": True})
+            attempts = [primary, _start_thread(self._timed_post, url, timeout, kwargs)]
+        else:
+            attempts = [primary]
+
+        # Take the first usable reply; a failure only counts once every attempt has failed
+        winner, pending = None, list(attempts)
+        while winner is None and pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            pending = [future for future in pending if future not in done]
+            for future in done:
+                if winner is None and future.exception() is None and future.result()[0].status_code not in RETRY_STATUSES:
+                    winner = future
+        if winner is not None and winner is not primary:
+            self._record(endpoint, hedge_wins=1)
+        if winner is None:
+            winner = attempts[-1]
+        for future in attempts:
+            if future is not winner:
+                future.add_done_callback(_close_response)
+
+        response, seconds = winner.result()
+        if response.status_code < 400:
+            window.add(seconds)
+        return response
+
+    def _timed_post(self, url, timeout, kwargs):
+        started = time.monotonic()
+        response = self.session.post(url, timeout=timeout, **kwargs)
+        return response, time.monotonic() - started
+
+    @staticmethod
+    def _trace_response(response, stream=False):
+        span = tracing.current_span()
+        if span is None:
+            return
+        body = response.request.body if response.request is not None else None
+        span.set(**{
+            "http.status_code": response.status_code,
+            "http.request.body.size": len(body) if body is not None and hasattr(body, "__len__") else None,
+            # Streamed bodies haven't been read yet; fall back to the declared length
+            "http.response.body.size": int(response.headers.get("Content-Length") or 0) or None if stream else len(response.content)
+        })
+        if response.status_code >= 400:
+            span.fail(f"HTTP {response.status_code}")
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter keeps concurrent sessions from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def post(self, endpoint, timeout=None, deadline=None, **kwargs):
+        """POST to an endpoint path (e.g. "chat/completions"), retrying throttled and transient failures
+
+        deadline is an optional time.monotonic() value the request, retries included, must finish by.
+        While the endpoint's circuit breaker is open this raises CircuitOpenError without sending.
+        """
+        breaker = self._breaker(endpoint) if self.breaker_threshold else None
+        if breaker is not None and not breaker.allow():
+            self._record(endpoint, rejected=1)
+            raise CircuitOpenError(f"The Mistral {endpoint} endpoint is failing; not sending requests for another {breaker.retry_in():.0f}s")
+
+        # Inside a trace, each call is a span carrying status, sizes, retries and queueing delay
+        with tracing.span(f"POST {endpoint}", **{"http.endpoint": endpoint}):
+            try:
+                response = self._post(endpoint, timeout, deadline, **kwargs)
+            except DeadlineExceeded:
+                if breaker is not None:
+                    breaker.record(None)
+                raise
+            except Exception:
+                if breaker is not None:
+                    breaker.record(False)
+                raise
+            if breaker is not None:
+                breaker.record(None if response.status_code == 429 else response.status_code not in RETRY_STATUSES)
+            return response
+
+    def _post(self, endpoint, timeout=None, caller_deadline=None, **kwargs):
+        connect_timeout, read_timeout, deadline_seconds = self.endpoint_timeouts.get(endpoint, (10, 120, 300))
+        if timeout is not None:
+            read_timeout = timeout
+        url = f"{self.base_url}/{endpoint}"
+        started = time.monotonic()
+        deadline = started + deadline_seconds
+        timeout_error = requests.Timeout
+        if caller_deadline is not None and caller_deadline < deadline:
+            deadline = caller_deadline
+            timeout_error = DeadlineExceeded
+        body = kwargs.get("data")
+
+        attempt = 0
+        while True:
+            if time.monotonic() >= deadline:
+                # Out of time before anything was sent: not a request, so requests never exceed attempts
+                if attempt:
+                    self._record(endpoint, requests=1, failures=1, latency_total=time.monotonic() - started)
+                else:
+                    self._record(endpoint, rejected=1)
+                raise timeout_error(f"Deadline exceeded for {endpoint}")
+            if attempt and hasattr(body, "rewind"):
+                body.rewind()
+
+            queue_delay = self.limiter.acquire() if self.limiter else 0.0
+            self._record(endpoint, attempts=1, queue_delay_total=queue_delay, queue_delay_max=queue_delay)
+            tracing.set_attributes(**{"http.retries": attempt})
+
+            remaining = deadline - time.monotonic()
+            retry_after = None
+            try:
+                # The caller's deadline is honored closely; the endpoint's own one leaves at least a second to read
+                min_read = 0.1 if timeout_error is DeadlineExceeded else 1.0
+                response = self._send(endpoint, url, (connect_timeout, max(min_read, min(read_timeout, remaining))), kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                response = None
+                if attempt >= self.max_retries or time.monotonic() >= deadline:
+                    self._record(endpoint, requests=1, failures=1, latency_total=time.monotonic() - started)
+                    if time.monotonic() >= deadline:
+                        raise timeout_error(f"Deadline exceeded for {endpoint}")
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    failed = response.status_code >= 400
+                    self._record(endpoint, requests=1, failures=int(failed), latency_total=time.monotonic() - started)
+                    self._trace_response(response, kwargs.get("stream"))
+                    return response
+                if response.status_code == 429:
+                    self._record(endpoint, throttled=1)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            delay = self._backoff(attempt, retry_after)
+            if time.monotonic() + delay >= deadline:
+                # No time left for another attempt: hand back what we have
+                self._record(endpoint, requests=1, failures=1, latency_total=time.monotonic() - started)
+                if response is None:
+                    raise timeout_error(f"Deadline exceeded for {endpoint}")
+                self._trace_response(response, kwargs.get("stream"))
+                return response
+
+            if response is not None:
+                # Return a streamed response's connection to the pool instead of holding it until garbage collection
+                response.close()
+            self._record(endpoint, retries=1)
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,276 @@
+"""Local stand-in for the Mistral transcription and chat endpoints.
+
+Run it and point the app or the batch runner at it to work offline:
+
+    python mock_mistral.py --port 8765
+    MISTRAL_API_BASE=http://127.0.0.1:8765/v1 MISTRAL_API_KEY=mock python batch.py recordings/ -o results.jsonl
+
+Latency can be fixed or drawn from a distribution, and a share of requests can be answered
+with 500s or 429s to exercise retries:
+
+    python mock_mistral.py --latency 0.8 --latency-dist lognormal --latency-spread 0.5 --error-rate 0.02 --throttle-rate 0.05
+"""
+import json
+import time
+import random
+import math
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+SENTENCES = [
+    "Thanks for taking the time to meet with us today.",
+    "Can you tell me a bit about your current process?",
+    "We mostly track everything in spreadsheets right now.",
+    "Our biggest concern is the price compared to what we pay today.",
+    "How does this integrate with our existing CRM?",
+    "Let me show you how the dashboard handles that.",
+    "We are also looking at an alternative from another vendor.",
+    "What kind of timeline are you working with?",
+    "The budget decision needs to go through our finance team.",
+    "Um, I think that would, like, actually work for us.",
+    "Would it make sense to schedule a follow-up next week?",
+    "That sounds good, send over the proposal."
+]
+
+
+def synthetic_transcription(num_segments, seed=0):
+    """Build a transcription response with num_segments timestamped segments"""
+    rng = random.Random(seed)
+    segments = []
+    start = 0.0
+    for _ in range(num_segments):
+        duration = round(rng.uniform(1.5, 12.0), 2)
+        segments.append({"start": round(start, 2), "end": round(start + duration, 2), "text": rng.choice(SENTENCES)})
+        start += duration + round(rng.uniform(0.0, 1.0), 2)
+    return {
+        "model": "voxtral-mini-2507",
+        "text": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": "en",
+        "usage": {"prompt_audio_seconds": int(start), "prompt_tokens": 0, "completion_tokens": len(segments) * 12}
+    }
+
+def synthetic_chat_content(request):
+    """Return structured JSON when a response_format is requested, otherwise free text"""
+    if request.get("response_format"):
+        return json.dumps({
+            "objections": ["Price is higher than the current tool", "Integration effort", "Needs finance sign-off"],
+            "competitors": ["Acme CRM"],
+            "scores": {
+                criterion: {"score": score, "explanation": "Synthetic explanation."}
+                for criterion, score in (("structure", 7), ("clarity", 6), ("confidence", 8), ("closing", 5))
+            },
+            "coaching_tips": ["Quantify ROI earlier", "Confirm next steps explicitly", "Handle price before the demo"]
+        })
+    if "COMPETITOR_NAMES:" in json.dumps(request.get("messages")):
+        return '- Acme CRM, mentioned as the current tool\nCOMPETITOR_NAMES: ["Acme CRM"]'
+    return (
+        "Structure: 7/10 - Clear agenda.\n"
+        "Clarity: 6/10 - Some jargon.\n"
+        "Confidence: 8/10 - Steady delivery.\n"
+        "Closing: 5/10 - No firm next step.\n"
+        "- Price is higher than the current tool\n- Integration effort\n- Needs finance sign-off"
+    )
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+def latency_sampler(latency, distribution="fixed", spread=0.0, seed=None):
+    """Return a function drawing one response delay in seconds
+
+    latency is the median delay, or a function returning it so it can be changed while serving.
+    spread is the +/- range for "uniform" and the log-space standard deviation for "lognormal"
+    (0.5 gives a long tail); "exponential" has a median of latency.
+    """
+    if distribution not in LATENCY_DISTRIBUTIONS:
+        raise ValueError(f"Unknown latency distribution: {distribution}")
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def sample():
+        median = latency() if callable(latency) else latency
+        with lock:
+            if distribution == "uniform":
+                return max(0.0, rng.uniform(median - spread, median + spread))
+            if distribution == "exponential":
+                return rng.expovariate(math.log(2) / median) if median > 0 else 0.0
+            if distribution == "lognormal":
+                return rng.lognormvariate(math.log(median), spread) if median > 0 else 0.0
+            return median
+
+    return sample
+
+
+class MockMistralHandler(BaseHTTPRequestHandler):
+    """Request handler serving /v1/audio/transcriptions and /v1/chat/completions"""
+
+    server_version = "MockMistral/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, content, prompt_tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        words = content.split(" ")
+        self.close_connection = True
+        try:
+            for i, word in enumerate(words):
+                delta = word if i == 0 else " " + word
+                chunk = {"choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+                if i == len(words) - 1:
+                    chunk["usage"] = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words), "total_tokens": prompt_tokens + len(words)}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(self.server.token_latency)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. its deadline cut the stream short
+            pass
+
+    def _fault(self):
+        """Answer with a 429 or 500 if this request was picked to fail; returns True if it did"""
+        with self.server.stats_lock:
+            roll = self.server.rng.random()
+        if roll < self.server.throttle_rate:
+            self.server.count("throttled")
+            body = json.dumps({"message": "Rate limit exceeded"}).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Retry-After", f"{self.server.retry_after:g}")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return True
+        if roll < self.server.throttle_rate + self.server.error_rate:
+            self.server.count("errors")
+            self._send_json(500, {"message": "Internal server error"})
+            return True
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.count("requests")
+        time.sleep(self.server.sample_latency())
+        if self._fault():
+            return
+
+        if self.path.endswith("/audio/transcriptions"):
+            self._send_json(200, self.server.transcription(len(body)))
+        elif self.path.endswith("/chat/completions"):
+            request = json.loads(body or b"{}")
+            prompt_tokens = len(json.dumps(request.get("messages", []))) // 4
+            time.sleep(self.server.prompt_latency * prompt_tokens / 1000)
+            if request.get("stream"):
+                self._send_stream(synthetic_chat_content(request), prompt_tokens)
+                return
+            self._send_json(200, {
+                "id": "mock",
+                "object": "chat.completion",
+                "model": request.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": synthetic_chat_content(request)}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 120, "total_tokens": prompt_tokens + 120}
+            })
+        else:
+            self._send_json(404, {"message": f"Unknown endpoint {self.path}"})
+
+
+class MockMistralServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the mock's settings and request counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, segments=60, verbose=False, token_latency=0.0, latency_dist="fixed",
+                 latency_spread=0.0, error_rate=0.0, throttle_rate=0.0, retry_after=1.0, seed=None, prompt_latency=0.0):
+        super().__init__(address, MockMistralHandler)
+        self.latency = latency
+        self.segments = segments
+        self.token_latency = token_latency
+        # Seconds per 1,000 prompt tokens, so long prompts are slower like on the real API
+        self.prompt_latency = prompt_latency
+        self.verbose = verbose
+        self.sample_latency = latency_sampler(lambda: self.latency, latency_dist, latency_spread, seed)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "throttled": 0}
+        self._transcriptions = {}
+
+    def count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def transcription(self, seed):
+        """Return the synthetic transcription for the current segment count, built once per size and seed"""
+        key = (self.segments, seed)
+        if key not in self._transcriptions:
+            # Large synthetic transcripts take a while to build; keep the last few
+            if len(self._transcriptions) >= 8:
+                self._transcriptions.pop(next(iter(self._transcriptions)))
+            self._transcriptions[key] = synthetic_transcription(self.segments, seed=seed)
+        return self._transcriptions[key]
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats = dict.fromkeys(self.stats, 0)
+
+
+def start_mock_server(host="127.0.0.1", port=0, latency=0.0, segments=60, verbose=False, token_latency=0.0, **faults):
+    """Start the mock server on a background thread and return it; its base URL is server.base_url
+
+    faults are passed to MockMistralServer: latency_dist, latency_spread, error_rate, throttle_rate,
+    retry_after, seed and prompt_latency.
+    """
+    server = MockMistralServer((host, port), latency, segments, verbose, token_latency, **faults)
+    server.base_url = f"http://{host}:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local mock of the Mistral transcription and chat endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Median seconds to wait before answering each request")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed", help="How response delays are drawn")
+    parser.add_argument("--latency-spread", type=float, default=0.0, help="Range for uniform, log-space sigma for lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, help="Seed for latencies and faults")
+    parser.add_argument("--segments", type=int, default=60, help="Number of segments in each synthetic transcript")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="Seconds between streamed tokens")
+    parser.add_argument("--prompt-latency", type=float, default=0.0, help="Extra seconds per 1,000 prompt tokens")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = start_mock_server(
+        args.host, args.port, args.latency, args.segments, args.verbose, args.token_latency,
+        latency_dist=args.latency_dist, latency_spread=args.latency_spread, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, retry_after=args.retry_after, seed=args.seed,
+        prompt_latency=args.prompt_latency
+    )
+    print(f"Mock Mistral API listening on {server.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
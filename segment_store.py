@@ -0,0 +1,180 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+SPEAKERS = ("Rep", "Customer")
+CALL_STAGES = ("intro", "discovery", "demo", "objections", "closing")
+
+
+class SegmentStore:
+    """Columnar, read-only view of a call's transcript segments"""
+
+    # Timing lives in NumPy arrays, speaker and stage as small integer codes and all segment
+    # text in one string addressed by an offsets array, so per-call aggregates are vectorized
+    # reductions instead of Python loops over segment dicts
+
+    def __init__(self, start, end, speaker, stage, text_buffer, text_offsets):
+        self.start = start
+        self.end = end
+        self.duration = end - start
+        self.speaker = speaker
+        self.stage = stage
+        self.text_buffer = text_buffer
+        self.text_offsets = text_offsets
+        self._stage_texts = {}
+        self._frame = None
+        self._digest = None
+
+    @classmethod
+    def from_segments(cls, segments, stage_index=None):
+        """Build the store from transcription segments and an optional per-segment stage index"""
+        n = len(segments)
+        start = np.fromiter((segment.get("start", 0) for segment in segments), dtype=np.float64, count=n)
+        end = np.fromiter((segment.get("end", 0) for segment in segments), dtype=np.float64, count=n)
+
+        # Simple alternating speaker assignment - even segments are rep, odd are customer
+        speaker = (np.arange(n) % 2).astype(np.int8)
+
+        if stage_index is None:
+            stage = np.full(n, -1, dtype=np.int8)
+        else:
+            stage = np.asarray(stage_index, dtype=np.int8)
+
+        texts = [segment.get("text", "") for segment in segments]
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+
+        return cls(start, end, speaker, stage, "".join(texts), offsets)
+
+    def __len__(self):
+        return len(self.start)
+
+    def digest(self):
+        """Return a hex digest of the call's timings, speakers, stages and text, for keying caches"""
+        if self._digest is None:
+            digest = hashlib.sha256()
+            for array in (self.start, self.end, self.speaker, self.stage):
+                digest.update(array.tobytes())
+            digest.update(self.text_buffer.encode("utf-8"))
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def text(self, i):
+        """Return the text of segment i"""
+        return self.text_buffer[self.text_offsets[i]:self.text_offsets[i + 1]]
+
+    def texts(self, indices=None):
+        """Return segment texts, optionally only for the given indices"""
+        if indices is None:
+            indices = range(len(self))
+        return [self.text(i) for i in indices]
+
+    @property
+    def call_duration(self):
+        return float(self.end[-1]) if len(self) else 0.0
+
+    def talk_time(self):
+        """Return (rep_seconds, customer_seconds)"""
+        totals = np.bincount(self.speaker, weights=self.duration, minlength=len(SPEAKERS))
+        return float(totals[0]), float(totals[1])
+
+    def talk_ratio(self):
+        """Return the rep-to-customer talk ratio"""
+        rep_time, customer_time = self.talk_time()
+        return rep_time / (customer_time if customer_time != 0 else 1)
+
+    def stage_aggregates(self):
+        """Return {stage: {"segments", "duration", "rep_time", "customer_time"}} for every call stage"""
+        valid = self.stage >= 0
+        stage = self.stage[valid]
+        duration = self.duration[valid]
+        rep = self.speaker[valid] == 0
+        counts = np.bincount(stage, minlength=len(CALL_STAGES))
+        durations = np.bincount(stage, weights=duration, minlength=len(CALL_STAGES))
+        rep_times = np.bincount(stage, weights=np.where(rep, duration, 0.0), minlength=len(CALL_STAGES))
+        return {
+            name: {
+                "segments": int(counts[i]),
+                "duration": float(durations[i]),
+                "rep_time": float(rep_times[i]),
+                "customer_time": float(durations[i] - rep_times[i])
+            }
+            for i, name in enumerate(CALL_STAGES)
+        }
+
+    def timeline_spans(self, max_spans=400, window=None):
+        """Return speaker/stage spans for drawing the timeline, at most max_spans of them
+
+        Within each speaker's row, consecutive segments of the same stage are merged when the
+        gap between them is below the resolution of the visible window. The tolerance doubles
+        until the row fits its share of max_spans, so the span count stays bounded however long
+        the call is. window=(start, end) limits the spans to one stretch of the call (zooming in).
+        Returns a dict of equal-length arrays: start, end, speaker, stage, count, first.
+        """
+        if window is None:
+            window = (0.0, self.call_duration)
+        lo, hi = window
+        visible = np.flatnonzero((self.end > lo) & (self.start < hi))
+        per_speaker = max(1, max_spans // len(SPEAKERS))
+        tolerance = (hi - lo) / max(1, max_spans * 4)
+
+        columns = {"start": [], "end": [], "speaker": [], "stage": [], "count": [], "first": []}
+        for speaker in range(len(SPEAKERS)):
+            rows = visible[self.speaker[visible] == speaker]
+            if not len(rows):
+                continue
+            start = np.maximum(self.start[rows], lo)
+            end = np.minimum(self.end[rows], hi)
+            stage = self.stage[rows]
+            row_tolerance = tolerance
+            while True:
+                # A new span starts at the first segment, on a stage change or after a long enough gap
+                gaps = start[1:] - np.maximum.accumulate(end)[:-1]
+                breaks = np.concatenate(([True], (gaps > row_tolerance) | (stage[1:] != stage[:-1])))
+                firsts = np.flatnonzero(breaks)
+                if len(firsts) <= per_speaker or row_tolerance > hi - lo:
+                    break
+                row_tolerance *= 2
+            columns["start"].append(start[firsts])
+            columns["end"].append(np.maximum.reduceat(end, firsts))
+            columns["speaker"].append(np.full(len(firsts), speaker, dtype=np.int8))
+            columns["stage"].append(stage[firsts])
+            columns["count"].append(np.diff(np.append(firsts, len(rows))))
+            columns["first"].append(rows[firsts])
+
+        empty = {"start": np.float64, "end": np.float64, "speaker": np.int8, "stage": np.int8, "count": np.int64, "first": np.int64}
+        return {
+            name: np.concatenate(parts) if parts else np.zeros(0, dtype=empty[name])
+            for name, parts in columns.items()
+        }
+
+    def stage_text(self, stage_name):
+        """Return the joined text of every segment in a stage"""
+        if stage_name not in self._stage_texts:
+            indices = np.flatnonzero(self.stage == CALL_STAGES.index(stage_name))
+            self._stage_texts[stage_name] = " ".join(self.texts(indices))
+        return self._stage_texts[stage_name]
+
+    def to_frame(self, indices=None):
+        """Return a numeric DataFrame with one row per segment, or only the given segments
+
+        The full frame is built once; treat it as read-only.
+        """
+        if indices is not None:
+            return self._build_frame(np.asarray(indices, dtype=np.int64))
+        if self._frame is None:
+            self._frame = self._build_frame(slice(None))
+        return self._frame
+
+    def _build_frame(self, rows):
+        index = np.arange(len(self))[rows]
+        return pd.DataFrame({
+            "Start": self.start[rows],
+            "End": self.end[rows],
+            "Duration": self.duration[rows],
+            "Speaker": pd.Categorical.from_codes(self.speaker[rows], SPEAKERS),
+            "Stage": pd.Categorical.from_codes(self.stage[rows], [name.capitalize() for name in CALL_STAGES]),
+            "Text": self.texts(index)
+        }, index=index)
@@ -0,0 +1,50 @@
+from audio_processing import audio_windows, remap_segments, stitch_segments
+
+
+# Trimmed audio whose first 10 seconds are the original 0-10s and the rest starts at the original 20s
+OFFSET_MAP = [(0.0, 0.0), (10.0, 20.0)]
+
+
+def test_remap_segments_shifts_segments_after_a_cut():
+    [segment] = remap_segments([{"start": 11.0, "end": 12.5, "text": "after"}], OFFSET_MAP)
+    assert (segment["start"], segment["end"]) == (21.0, 22.5)
+
+def test_remap_segments_stretches_a_segment_straddling_a_cut():
+    [segment] = remap_segments([{"start": 8.0, "end": 12.0, "text": "straddles"}], OFFSET_MAP)
+    assert (segment["start"], segment["end"]) == (8.0, 22.0)
+
+def test_remap_segments_keeps_an_end_on_the_cut_in_the_earlier_piece():
+    before, after = remap_segments([{"start": 5.0, "end": 10.0}, {"start": 10.0, "end": 11.0}], OFFSET_MAP)
+    assert (before["start"], before["end"]) == (5.0, 10.0)
+    assert (after["start"], after["end"]) == (20.0, 21.0)
+
+def test_remap_segments_without_an_offset_map_is_a_no_op():
+    segments = [{"start": 1.0, "end": 2.0}]
+    assert remap_segments(segments, []) is segments
+
+def test_audio_windows_overlap_and_cover_the_recording():
+    assert audio_windows(1300, chunk_seconds=600, overlap_seconds=5) == [(0, 600), (595, 600), (1190, 110)]
+
+def test_stitch_segments_keeps_one_copy_of_a_duplicate_in_the_overlap():
+    chunks = [
+        (0, [{"start": 590.0, "end": 594.0, "text": "Earlier"}, {"start": 596.0, "end": 599.0, "text": "In the overlap"}]),
+        (595, [{"start": 1.0, "end": 4.0, "text": "In the overlap"}, {"start": 6.0, "end": 8.0, "text": "Later"}])
+    ]
+    assert [segment["text"] for segment in stitch_segments(chunks, overlap_seconds=5)] == ["Earlier", "In the overlap", "Later"]
+
+def test_stitch_segments_merges_a_duplicate_on_either_side_of_the_midpoint():
+    # The midpoint of the 595-600s overlap is 597.5: the first chunk keeps what starts before it, the second the rest
+    chunks = [
+        (0, [{"start": 597.4, "end": 599.0, "text": "Sounds good."}]),
+        (595, [{"start": 2.6, "end": 4.5, "text": "sounds good"}])
+    ]
+    [segment] = stitch_segments(chunks, overlap_seconds=5)
+    assert segment["start"] == 597.4
+    assert segment["end"] == 599.5
+
+def test_stitch_segments_assigns_a_segment_on_the_midpoint_to_the_later_chunk():
+    chunks = [
+        (0, [{"start": 597.5, "end": 599.0, "text": "first take"}]),
+        (595, [{"start": 2.5, "end": 4.0, "text": "second take"}])
+    ]
+    assert [segment["text"] for segment in stitch_segments(chunks, overlap_seconds=5)] == ["second take"]
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from job_queue import JobQueue, JobLimitError
+
+
+def handler(job, context):
+    return {"echo": job["payload"]}
+
+def make_queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / "jobs.sqlite"), handler, poll_interval=0.05, **kwargs)
+
+
+def test_submit_enforces_the_pending_limit_per_user(tmp_path):
+    queue = make_queue(tmp_path, max_pending_per_user=2)
+    queue.submit("alice", {})
+    queue.submit("alice", {})
+    with pytest.raises(JobLimitError):
+        queue.submit("alice", {})
+    # Other users have their own limit
+    queue.submit("bob", {})
+
+def test_claim_runs_one_job_per_user_at_a_time(tmp_path):
+    queue = make_queue(tmp_path, max_running_per_user=1)
+    first = queue.submit("alice", {"n": 1})
+    queue.submit("alice", {"n": 2})
+    other = queue.submit("bob", {"n": 3})
+
+    assert queue._claim_next()["id"] == first
+    # Alice's second job waits for her first, so Bob's goes next
+    assert queue._claim_next()["id"] == other
+    assert queue._claim_next() is None
+
+def test_live_running_job_is_not_taken_by_another_queue(tmp_path):
+    owner = make_queue(tmp_path, stale_after=60)
+    job_id = owner.submit("alice", {})
+    owner._claim_next()
+
+    other = make_queue(tmp_path, stale_after=60)
+    assert other._claim_next() is None
+    assert other.get(job_id)["owner"] == owner.owner
+
+def test_job_is_requeued_after_its_heartbeat_times_out(tmp_path):
+    finished = []
+    owner = make_queue(tmp_path, stale_after=0.2, on_finish=finished.append)
+    job_id = owner.submit("alice", {})
+    job = owner._claim_next()
+
+    time.sleep(0.3)
+    other = make_queue(tmp_path, stale_after=0.2)
+    claimed = other._claim_next()
+    assert claimed["id"] == job_id
+    assert claimed["owner"] == other.owner
+
+    # The original owner's late result must not overwrite the new run
+    owner._finish(job, "succeeded", "Done", result={"stale": True})
+    assert owner.get(job_id)["status"] == "running"
+    assert finished == []
+
+def test_worker_runs_a_job_and_calls_on_finish(tmp_path):
+    finished = []
+    queue = make_queue(tmp_path, on_finish=finished.append).start()
+    try:
+        job_id = queue.submit("alice", {"n": 1})
+        for _ in range(100):
+            if queue.get(job_id)["status"] == "succeeded":
+                break
+            time.sleep(0.05)
+        assert queue.get(job_id)["result"] == {"echo": {"n": 1}}
+        assert [job["id"] for job in finished] == [job_id]
+    finally:
+        queue.stop()
+
+def test_cancel_finishes_a_queued_job_immediately(tmp_path):
+    finished = []
+    queue = make_queue(tmp_path, on_finish=finished.append)
+    job_id = queue.submit("alice", {})
+    queue.cancel(job_id)
+    assert queue.get(job_id)["status"] == "cancelled"
+    assert [job["id"] for job in finished] == [job_id]
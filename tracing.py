@@ -0,0 +1,319 @@
+import os
+import json
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import requests
+
+
+# Buckets for the span duration histogram, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+OTLP_STATUS_CODES = {"unset": 0, "ok": 1, "error": 2}
+
+_current_span = contextvars.ContextVar("repradar_current_span", default=None)
+
+
+def _new_id(n_bytes):
+    return os.urandom(n_bytes).hex()
+
+
+class Span:
+    """One timed operation in a trace, with attributes such as bytes sent or tokens used"""
+
+    def __init__(self, name, trace, parent=None, attributes=None):
+        self.name = name
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes or {})
+        self.status = "unset"
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set(self, **attributes):
+        """Set attributes on the span; None values are ignored"""
+        self.attributes.update((key, value) for key, value in attributes.items() if value is not None)
+
+    def fail(self, message):
+        self.status = "error"
+        self.error = str(message)
+
+    @property
+    def duration(self):
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+class Trace:
+    """The spans recorded for one call or one render, in the order they finished"""
+
+    def __init__(self, name):
+        self.name = name
+        self.trace_id = _new_id(16)
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def _finish(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+    def to_dicts(self):
+        """Return the finished spans as JSON-serializable dicts ordered by start time"""
+        with self.lock:
+            spans = sorted(self.spans, key=lambda span: (span.start_ns, -span.end_ns))
+        return [dict(span.to_dict(), trace_id=self.trace_id) for span in spans]
+
+
+@contextmanager
+def trace(name, exporter=None, enabled=True, **attributes):
+    """Start a trace whose root span covers the block; yields the Trace (None when disabled)
+
+    Spans opened with span() inside the block, including in threads started through wrap(),
+    are recorded in it. On exit the trace is handed to the exporter.
+    """
+    if not enabled:
+        yield None
+        return
+    call_trace = Trace(name)
+    try:
+        with _open_span(name, call_trace, None, attributes):
+            yield call_trace
+    finally:
+        if exporter is not None:
+            exporter.export(call_trace)
+
+@contextmanager
+def span(name, **attributes):
+    """Time the block as a child of the current span; yields the Span, or None outside a trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    with _open_span(name, parent.trace, parent, attributes) as child:
+        yield child
+
+@contextmanager
+def _open_span(name, call_trace, parent, attributes):
+    current = Span(name, call_trace, parent, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(f"{type(e).__name__}: {e}")
+        raise
+    else:
+        if current.status == "unset":
+            current.status = "ok"
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        call_trace._finish(current)
+
+def current_span():
+    """Return the innermost open span, or None outside a trace"""
+    return _current_span.get()
+
+def set_attributes(**attributes):
+    """Set attributes on the innermost open span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+def traced(name=None):
+    """Decorator that runs each call of the function in a span named after it"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with span(name or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def wrap(fn, name=None, **attributes):
+    """Bind fn to the caller's trace context so spans it opens in a worker thread nest correctly
+
+    With a name, each call of fn is itself recorded as a span.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        if name is None:
+            return fn(*args, **kwargs)
+        with span(name, **attributes):
+            return fn(*args, **kwargs)
+
+    return lambda *args, **kwargs: context.run(run, *args, **kwargs)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(spans, service_name="repradar"):
+    """Convert span dicts (Trace.to_dicts) to an OTLP/JSON ExportTraceServiceRequest"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "repradar.tracing"},
+                "spans": [{
+                    "traceId": span["trace_id"],
+                    "spanId": span["span_id"],
+                    "parentSpanId": span["parent_id"] or "",
+                    "name": span["name"],
+                    "kind": 1,
+                    "startTimeUnixNano": str(span["start_ns"]),
+                    "endTimeUnixNano": str(span["end_ns"]),
+                    "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span["attributes"].items()],
+                    "status": {"code": OTLP_STATUS_CODES[span["status"]], "message": span["error"] or ""}
+                } for span in spans]
+            }]
+        }]
+    }
+
+
+class PrometheusMetrics:
+    """Process-wide counters and a span duration histogram derived from finished traces"""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.durations = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def _count(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, spans):
+        with self.lock:
+            for span in spans:
+                duration = (span["end_ns"] - span["start_ns"]) / 1e9
+                histogram = self.durations.setdefault(span["name"], [[0] * len(self.buckets), 0, 0.0])
+                for i, bound in enumerate(self.buckets):
+                    if duration <= bound:
+                        histogram[0][i] += 1
+                histogram[1] += 1
+                histogram[2] += duration
+                if span["status"] == "error":
+                    self._count("repradar_span_errors_total", {"span": span["name"]}, 1)
+
+                attributes = span["attributes"]
+                endpoint = attributes.get("http.endpoint")
+                if endpoint:
+                    status = attributes.get("http.status_code", "error")
+                    self._count("repradar_http_requests_total", {"endpoint": endpoint, "status": str(status)}, 1)
+                    self._count("repradar_http_retries_total", {"endpoint": endpoint}, attributes.get("http.retries", 0))
+                    self._count("repradar_http_sent_bytes_total", {"endpoint": endpoint}, attributes.get("http.request.body.size", 0))
+                    self._count("repradar_http_received_bytes_total", {"endpoint": endpoint}, attributes.get("http.response.body.size", 0))
+                for token_type in ("input", "output"):
+                    tokens = attributes.get(f"gen_ai.usage.{token_type}_tokens")
+                    if tokens:
+                        self._count("repradar_tokens_total", {"type": token_type}, tokens)
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format"""
+        def labels(pairs):
+            return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}" if pairs else ""
+
+        lines = [
+            "# HELP repradar_span_duration_seconds Duration of traced pipeline and render stages",
+            "# TYPE repradar_span_duration_seconds histogram"
+        ]
+        with self.lock:
+            for name, (bucket_counts, count, total) in sorted(self.durations.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f"repradar_span_duration_seconds_bucket{labels([('span', name), ('le', f'{bound:g}')])} {bucket_count}")
+                lines.append(f"repradar_span_duration_seconds_bucket{labels([('span', name), ('le', '+Inf')])} {count}")
+                lines.append(f"repradar_span_duration_seconds_sum{labels([('span', name)])} {total:.6f}")
+                lines.append(f"repradar_span_duration_seconds_count{labels([('span', name)])} {count}")
+            declared = set()
+            for (name, pairs), value in sorted(self.counters.items()):
+                if name not in declared:
+                    lines.append(f"# TYPE {name} counter")
+                    declared.add(name)
+                lines.append(f"{name}{labels(pairs)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class TraceExporter:
+    """Send finished traces to an OTLP/JSON file and/or HTTP endpoint and keep Prometheus metrics"""
+
+    # The OTLP file holds one ExportTraceServiceRequest per line, like the OpenTelemetry
+    # Collector's file exporter. The metrics file is rewritten after every trace and can be
+    # scraped with node_exporter's textfile collector.
+
+    def __init__(self, trace_file=None, otlp_endpoint=None, metrics_path=None, timeout=5, metrics_interval=10.0):
+        self.trace_file = trace_file
+        self.otlp_endpoint = otlp_endpoint
+        self.metrics_path = metrics_path
+        self.timeout = timeout
+        self.metrics_interval = metrics_interval
+        self._metrics_written = 0.0
+        self.metrics = PrometheusMetrics()
+        self._file_lock = threading.Lock()
+        for path in (trace_file, metrics_path):
+            directory = os.path.dirname(path or "")
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def observe(self, call_trace):
+        """Add a trace's spans to the metrics without exporting the trace
+
+        The metrics file is rewritten at most every metrics_interval seconds from here.
+        """
+        self.metrics.observe(call_trace.to_dicts())
+        if self.metrics_path and time.monotonic() - self._metrics_written >= self.metrics_interval:
+            self._write_metrics()
+
+    def export(self, call_trace):
+        spans = call_trace.to_dicts()
+        self.metrics.observe(spans)
+        if self.metrics_path:
+            self._write_metrics()
+        if self.trace_file or self.otlp_endpoint:
+            payload = json.dumps(to_otlp(spans))
+            if self.trace_file:
+                with self._file_lock, open(self.trace_file, "a", encoding="utf-8") as f:
+                    f.write(payload + "\n")
+            if self.otlp_endpoint:
+                # Never hold up the pipeline on the collector
+                threading.Thread(target=self._post, args=(payload,), daemon=True).start()
+
+    def _write_metrics(self):
+        # Write then rename so scrapers never see a half-written file
+        temp_path = f"{self.metrics_path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.metrics.render())
+        os.replace(temp_path, self.metrics_path)
+        self._metrics_written = time.monotonic()
+
+    def _post(self, payload):
+        try:
+            requests.post(self.otlp_endpoint, data=payload, headers={"Content-Type": "application/json"}, timeout=self.timeout)
+        except requests.RequestException:
+            pass
@@ -0,0 +1,131 @@
+import os
+import time
+import uuid
+import shutil
+import tempfile
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+@contextmanager
+def spooled_upload(audio_file, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Yield a disk-backed file for audio_file, spilling in-memory uploads to a temp file"""
+    try:
+        audio_file.fileno()
+        audio_file.seek(0)
+        yield audio_file
+        return
+    except (AttributeError, OSError, ValueError):
+        pass
+
+    audio_file.seek(0)
+    spool = tempfile.NamedTemporaryFile(prefix="repradar-upload-", delete=False)
+    try:
+        shutil.copyfileobj(audio_file, spool, chunk_size)
+        spool.flush()
+        spool.seek(0)
+        audio_file.seek(0)
+        yield spool
+    finally:
+        spool.close()
+        os.unlink(spool.name)
+
+
+@contextmanager
+def downloaded_audio(audio_url, chunk_size=UPLOAD_CHUNK_SIZE, timeout=(10, 300), max_seconds=None):
+    """Yield a temp file holding the audio at audio_url, downloaded in chunks
+
+    Raises requests.Timeout if the whole download takes longer than max_seconds.
+    """
+    suffix = os.path.splitext(urlsplit(audio_url).path)[1]
+    spool = tempfile.NamedTemporaryFile(prefix="repradar-download-", suffix=suffix, delete=False)
+    try:
+        started = time.monotonic()
+        with requests.get(audio_url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size):
+                spool.write(chunk)
+                if max_seconds is not None and time.monotonic() - started > max_seconds:
+                    raise requests.Timeout(f"Downloading {audio_url} took longer than {max_seconds:g}s")
+        spool.flush()
+        spool.seek(0)
+        yield spool
+    finally:
+        spool.close()
+        os.unlink(spool.name)
+
+
+class MultipartStream:
+    """File-like multipart/form-data body that streams the file part from disk in fixed-size chunks"""
+
+    def __init__(self, fields, file_field, file, filename, content_type="application/octet-stream",
+                 chunk_size=UPLOAD_CHUNK_SIZE, progress=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.file = file
+        self.chunk_size = chunk_size
+        self.progress = progress
+
+        head = b"".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+            for name, value in fields.items()
+        )
+        head += (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+
+        file.seek(0, os.SEEK_END)
+        self.file_size = file.tell()
+        self._head = head
+        self._tail = tail
+        # A known length lets requests send Content-Length instead of chunked encoding
+        self.len = len(head) + self.file_size + len(tail)
+        self.rewind()
+
+    def __len__(self):
+        return self.len
+
+    def rewind(self):
+        """Reset the stream so the body can be sent again (e.g. on retry)"""
+        self.file.seek(0)
+        self._parts = [self._head, None, self._tail]
+        self._buffer = b""
+        self.sent = 0
+
+    def _fill(self, size):
+        while len(self._buffer) < size and self._parts:
+            part = self._parts[0]
+            if part is None:
+                data = self.file.read(self.chunk_size)
+                if not data:
+                    self._parts.pop(0)
+                    continue
+                self._buffer += data
+            else:
+                self._buffer += part
+                self._parts.pop(0)
+
+    def read(self, size=-1):
+        # Never hand back the whole body at once, even when asked to read everything
+        if size is None or size < 0:
+            size = self.chunk_size
+        self._fill(size)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self.sent += len(data)
+        if self.progress and data:
+            self.progress(self.sent, self.len)
+        return data
+
+    def __iter__(self):
+        while True:
+            data = self.read(self.chunk_size)
+            if not data:
+                return
+            yield data